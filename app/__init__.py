@@ -1,78 +1,184 @@
 import os
 from datetime import datetime
-from dotenv import load_dotenv
-from flask import Flask, redirect, url_for, request
+from flask import Flask, redirect, url_for, request, flash
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager, current_user
-from flask_migrate import Migrate
+from app.database import RoutingSession
 
 # =========================
-# Load Environment Variables
+# Extensions (bound in create_app)
 # =========================
-load_dotenv()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+bcrypt = Bcrypt()
+login_manager = LoginManager()
+login_manager.login_view = "main.login"
+login_manager.login_message_category = "info"
 
-# =========================
-# Create App
-# =========================
-app = Flask(__name__)
 
 # =========================
-# Configuration
+# Application Factory
 # =========================
-app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev_secret_key")
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
-    "DATABASE_URL", "sqlite:///hospital.db"
-)
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+def create_app(config=None):
+    """
+    Build the Flask app.
 
-# =========================
-# Extensions
-# =========================
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-bcrypt = Bcrypt(app)
-login_manager = LoginManager(app)
-login_manager.login_view = "main.login"
-login_manager.login_message_category = "info"
+    ``config`` is a profile name ("development", "testing", "production"),
+    a config object, or a dict of overrides on top of the APP_CONFIG
+    profile (default "production").
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
 
-# =========================
-# Import Models (after db init)
-# =========================
-from app import models
-from app.models import Notification
+    from app.config import config_by_name
 
-# =========================
-# Register Blueprints
-# =========================
-from app.routes import main_bp, admin_bp, patient_bp, doctor_bp
+    app = Flask(__name__)
+
+    # =========================
+    # Configuration
+    # =========================
+    profile = config if isinstance(config, str) else os.environ.get("APP_CONFIG", "production")
+    app.config.from_object(config_by_name[profile])
+
+    if isinstance(config, dict):
+        app.config.from_mapping(config)
+    elif config is not None and not isinstance(config, str):
+        app.config.from_object(config)
+
+    # =========================
+    # Extensions
+    # =========================
+    from app.database import init_engine_options, register_sqlite_pragmas
+
+    init_engine_options(app)
+    db.init_app(app)
+    register_sqlite_pragmas(app, db)
+    bcrypt.init_app(app)
+    login_manager.init_app(app)
+
+    # Flask-Migrate pulls in Alembic, only needed for "flask db ..."
+    if app.config.get("MIGRATIONS_ENABLED"):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # =========================
+    # Import Models (registers the user loader and change tracking)
+    # =========================
+    from app import models  # noqa: F401
+    from app import versioning  # noqa: F401
+
+    # =========================
+    # Register Blueprints
+    # =========================
+    from app.routes import main_bp, admin_bp, patient_bp, doctor_bp
+
+    app.register_blueprint(main_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(patient_bp)
+    app.register_blueprint(doctor_bp)
+
+    # =========================
+    # Static Assets (fingerprinted, precompressed)
+    # =========================
+    from app.assets import init_assets
+
+    init_assets(app)
+
+    # =========================
+    # Template Fragment Cache
+    # =========================
+    from app.fragment_cache import init_fragment_cache
+
+    init_fragment_cache(app)
+
+    # =========================
+    # Reference Data Cache
+    # =========================
+    from app.reference import init_reference_cache
+
+    init_reference_cache(app)
+
+    # =========================
+    # Template Bytecode Cache
+    # =========================
+    from app.template_cache import init_template_cache
+
+    init_template_cache(app)
+
+    # =========================
+    # Idempotency Keys
+    # =========================
+    from app.idempotency import init_idempotency
+
+    init_idempotency(app)
+
+    # =========================
+    # Appointment Housekeeping
+    # =========================
+    from app.appointments import init_appointments
+
+    init_appointments(app)
+
+    # =========================
+    # Appointment Reminders
+    # =========================
+    from app.reminders import init_reminders
+
+    init_reminders(app)
+
+    # =========================
+    # Hooks
+    # =========================
+    from app.passwords import PasswordPoolBusy
+    from app.database import remember_writes
+    from app.compression import init_compression
+    from app.tenancy import init_tenancy
+
+    # Registered first so it runs last, on the final body
+    init_compression(app)
+
+    # Resolves the tenant before any other hook queries the database
+    init_tenancy(app)
+
+    app.before_request(force_password_change)
+    app.after_request(remember_writes)
+    app.register_error_handler(PasswordPoolBusy, password_pool_busy)
+    app.context_processor(navbar_context)
+    app.context_processor(inject_globals)
+
+    return app
 
-app.register_blueprint(main_bp)
-app.register_blueprint(admin_bp)
-app.register_blueprint(patient_bp)
-app.register_blueprint(doctor_bp)
 
 # =========================
 # Force Doctor Password Change
 # =========================
-@app.before_request
 def force_password_change():
+    # Check the endpoint first, so asset requests never touch the session
     if (
-        current_user.is_authenticated
+        request.endpoint
+        and request.endpoint != "doctor.change_password"
+        and not request.endpoint.startswith(("static", "assets"))
+        and current_user.is_authenticated
         and current_user.role == "doctor"
         and current_user.must_change_password
-        and request.endpoint
-        and request.endpoint != "doctor.change_password"
-        and not request.endpoint.startswith("static")
     ):
         return redirect(url_for("doctor.change_password"))
 
 
+# =========================
+# Password Pool Saturated
+# =========================
+def password_pool_busy(error):
+    flash("The server is busy right now. Please try again in a moment.", "warning")
+    return redirect(request.url)
+
+
 # =========================
 # Global Notification Context (Navbar)
 # =========================
-@app.context_processor
 def navbar_context():
+    from app.models import Notification
+
     if current_user.is_authenticated:
         unread = Notification.query.filter_by(
             user_id=current_user.id,
@@ -93,6 +199,5 @@ def navbar_context():
 # =========================
 # Global Year for Footer
 # =========================
-@app.context_processor
 def inject_globals():
     return {"current_year": datetime.now().year}
@@ -0,0 +1,270 @@
+"""
+Appointment status changes.
+
+Every status change goes through ``bulk_transition`` (or ``transition``
+for a single appointment). TRANSITIONS lists the allowed moves. A change
+is one conditional UPDATE ... RETURNING that only matches appointments
+still in the expected status, one bulk INSERT into the status history and
+at most one bulk INSERT of notifications, however many appointments are
+involved. Two requests racing on the same appointment can't both win:
+the loser's UPDATE matches nothing.
+
+``start_leave`` uses it to cancel a doctor's bookings over a date range
+in one transaction, after removing their availability so nothing new can
+be booked there.
+
+``expire_no_shows`` uses it to move BOOKED appointments that are more
+than NO_SHOW_GRACE_HOURS in the past to NO_SHOW, NO_SHOW_BATCH_SIZE at a
+time with a commit per chunk, so it can run alongside live traffic. Run
+it from cron with ``flask appointments expire-no-shows``.
+"""
+
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+from app.booking import SLOT_DURATION
+from app.locks import slot_locks
+from app.models import Appointment, AppointmentStatusHistory, Availability, Notification, Tenant
+from app.tenancy import tenant_context
+
+
+TRANSITIONS = {
+    "BOOKED": {"COMPLETED", "CANCELLED", "NO_SHOW"},
+    "COMPLETED": set(),
+    "CANCELLED": set(),
+    "NO_SHOW": set(),
+}
+
+# What bulk_transition returns for each appointment it changed
+Changed = namedtuple("Changed", "id tenant_id patient_id doctor_id appointment_datetime old_status")
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def sources(new_status):
+    """Statuses an appointment can move to ``new_status`` from."""
+    return sorted(old for old, targets in TRANSITIONS.items() if new_status in targets)
+
+
+# -----------------------------
+# Transitions
+# -----------------------------
+def bulk_transition(ids, new_status, notify=None):
+    """
+    Move the appointments in ``ids`` (a list or a subquery of ids) to
+    ``new_status``, skipping any whose status doesn't allow it.
+    ``notify(changed)`` may return a (user_id, type, message) notification
+    for each one. Returns [Changed] and leaves committing to the caller.
+    """
+    allowed = sources(new_status)
+    if not allowed:
+        raise InvalidTransition(f"Nothing can move to {new_status}.")
+
+    changed_at = datetime.utcnow()
+    changed = []
+    for old_status in allowed:
+        rows = db.session.execute(
+            update(Appointment)
+            .where(Appointment.id.in_(ids), Appointment.status == old_status)
+            .values(status=new_status, updated_at=changed_at)
+            .returning(
+                Appointment.id,
+                Appointment.tenant_id,
+                Appointment.patient_id,
+                Appointment.doctor_id,
+                Appointment.appointment_datetime,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        changed += [Changed(*row, old_status) for row in rows]
+
+    if not changed:
+        return changed
+
+    db.session.execute(insert(AppointmentStatusHistory), [
+        {
+            "appointment_id": row.id,
+            "old_status": row.old_status,
+            "new_status": new_status,
+            "changed_at": changed_at,
+        }
+        for row in changed
+    ])
+
+    if notify:
+        notifications = []
+        for row in changed:
+            notification = notify(row)
+            if notification:
+                user_id, type_, message = notification
+                notifications.append({
+                    "tenant_id": row.tenant_id,
+                    "user_id": user_id,
+                    "type": type_,
+                    "message": message,
+                    "is_read": False,
+                    "created_at": changed_at,
+                })
+        if notifications:
+            db.session.execute(insert(Notification), notifications)
+
+    return changed
+
+
+def transition(appointment, new_status, notify=None):
+    """Move one loaded appointment, returns False if it wasn't allowed."""
+    if new_status not in TRANSITIONS.get(appointment.status, ()):
+        return False
+
+    changed = bulk_transition([appointment.id], new_status, notify)
+    if not changed:
+        return False  # someone else changed it first
+
+    # Keep the loaded object in step without flushing it again
+    set_committed_value(appointment, "status", new_status)
+    return True
+
+
+# -----------------------------
+# Doctor leave
+# -----------------------------
+# removed: availability blocks deleted, cancelled: [Changed]
+Leave = namedtuple("Leave", "removed cancelled")
+
+
+def _bookable_slots(doctor_profile, start, end):
+    """Every slot in the doctor's availability between two dates (inclusive)."""
+    slots = []
+    for available_date, start_time, end_time in (
+        db.session.query(Availability.available_date, Availability.start_time, Availability.end_time)
+        .filter(
+            Availability.doctor_profile_id == doctor_profile.id,
+            Availability.available_date >= start,
+            Availability.available_date <= end
+        )
+    ):
+        slot = datetime.combine(available_date, start_time)
+        while slot + SLOT_DURATION <= datetime.combine(available_date, end_time):
+            slots.append(slot)
+            slot += SLOT_DURATION
+    return slots
+
+
+def start_leave(doctor_profile, start, end, reason=None):
+    """
+    Take the doctor off from ``start`` to ``end`` (dates, inclusive): remove
+    their availability and cancel their upcoming bookings, notifying each
+    patient. Everything is committed together; returns a Leave.
+    """
+    # Holding the locks of every bookable slot means no booking can land
+    # between removing the availability and cancelling
+    with slot_locks(doctor_profile.user_id, _bookable_slots(doctor_profile, start, end)):
+        removed = (
+            Availability.query
+            .filter(
+                Availability.doctor_profile_id == doctor_profile.id,
+                Availability.available_date >= start,
+                Availability.available_date <= end
+            )
+            .delete(synchronize_session=False)
+        )
+
+        booked = (
+            select(Appointment.id)
+            .where(
+                Appointment.doctor_id == doctor_profile.user_id,
+                Appointment.appointment_datetime >= max(datetime.now(), datetime.combine(start, time.min)),
+                Appointment.appointment_datetime < datetime.combine(end + timedelta(days=1), time.min)
+            )
+            .scalar_subquery()
+        )
+
+        note = f" ({reason})" if reason else ""
+        cancelled = bulk_transition(
+            booked,
+            "CANCELLED",
+            notify=lambda changed: (
+                changed.patient_id,
+                "APPOINTMENT_CANCELLED",
+                f"Dr. {doctor_profile.full_name} is on leave{note}, so your appointment "
+                f"scheduled for {changed.appointment_datetime.strftime('%d %b %Y %I:%M %p')} "
+                f"has been cancelled."
+            )
+        )
+
+        db.session.commit()
+
+    return Leave(removed=removed, cancelled=cancelled)
+
+
+# -----------------------------
+# No-show expiry
+# -----------------------------
+def expire_no_shows(now=None, grace_hours=None, batch_size=None):
+    """Expire stale bookings in the current database, returns how many."""
+    config = current_app.config
+    now = now or datetime.now()
+    if grace_hours is None:
+        grace_hours = config["NO_SHOW_GRACE_HOURS"]
+    cutoff = now - timedelta(hours=grace_hours)
+    batch_size = batch_size or config["NO_SHOW_BATCH_SIZE"]
+
+    expired = 0
+    while True:
+        stale = (
+            select(Appointment.id)
+            .where(
+                Appointment.status == "BOOKED",
+                Appointment.appointment_datetime < cutoff
+            )
+            .order_by(Appointment.appointment_datetime)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        changed = bulk_transition(stale, "NO_SHOW")
+        db.session.commit()
+
+        expired += len(changed)
+        if len(changed) < batch_size:
+            return expired
+
+
+def expire_all_no_shows(**kwargs):
+    """No-show expiry for the primary database and every tenant with its own."""
+    expired = expire_no_shows(**kwargs)
+
+    bound = Tenant.query.filter(Tenant.bind_key.isnot(None)).all()
+    for tenant in bound:
+        with tenant_context(tenant):
+            expired += expire_no_shows(**kwargs)
+        db.session.remove()
+
+    return expired
+
+
+def init_appointments(app):
+    app.cli.add_command(appointments_cli)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+appointments_cli = AppGroup("appointments", help="Appointment housekeeping.")
+
+
+@appointments_cli.command("expire-no-shows")
+@click.option("--grace-hours", type=int, help="How long past its time a booking is kept (default NO_SHOW_GRACE_HOURS).")
+@click.option("--batch-size", type=int, help="Appointments per chunk (default NO_SHOW_BATCH_SIZE).")
+def expire_no_shows_command(grace_hours, batch_size):
+    """Mark untreated past bookings as NO_SHOW (safe to re-run)."""
+    expired = expire_all_no_shows(grace_hours=grace_hours, batch_size=batch_size)
+    click.echo(f"Marked {expired} appointments as no-show.")
@@ -0,0 +1,168 @@
+"""
+Fingerprinted, precompressed static assets.
+
+``flask assets build`` (run at deploy/build time) copies every file in
+app/static to app/static/dist under a content-hashed name, writes gzip and
+(if the ``brotli`` package is installed) brotli variants for text assets,
+and records the mapping in dist/manifest.json.
+
+Once a manifest exists, ``url_for('static', filename=...)`` in templates
+resolves to the fingerprinted file under /assets/, which is served with the
+best precompressed variant the client accepts and far-future immutable
+cache headers. Without a manifest everything falls back to plain /static.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+import click
+from flask import current_app, request, send_from_directory, url_for, abort
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+# -----------------------------
+# Build
+# -----------------------------
+def fingerprint(path, length=10):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def build(static_folder, level=9):
+    """Build dist/ from ``static_folder`` and return the manifest."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist]
+
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_folder).replace(os.sep, "/")
+            stem, ext = os.path.splitext(relative)
+            hashed = f"{stem}.{fingerprint(source)}{ext}"
+
+            target = os.path.join(dist, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+
+            if ext.lower() in COMPRESSIBLE:
+                with open(source, "rb") as fh:
+                    data = fh.read()
+
+                with open(target + ".gz", "wb") as fh:
+                    fh.write(gzip.compress(data, compresslevel=level, mtime=0))
+
+                if brotli is not None:
+                    with open(target + ".br", "wb") as fh:
+                        fh.write(brotli.compress(data, quality=11))
+
+            manifest[relative] = hashed
+
+    with open(os.path.join(dist, MANIFEST_NAME), "w") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+
+    return manifest
+
+
+# -----------------------------
+# Runtime
+# -----------------------------
+def load_manifest(app):
+    path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(filename, **values):
+    manifest = current_app.extensions.get("assets_manifest") or {}
+    hashed = manifest.get(filename)
+    if hashed is None:
+        return url_for("static", filename=filename, **values)
+    return url_for("assets", filename=hashed, **values)
+
+
+def asset_url_for(endpoint, **values):
+    """Drop-in ``url_for`` that fingerprints ``static`` URLs."""
+    if endpoint == "static" and "filename" in values:
+        return asset_url(values.pop("filename"), **values)
+    return url_for(endpoint, **values)
+
+
+def serve_asset(filename):
+    manifest = current_app.extensions.get("assets_manifest") or {}
+    if filename not in manifest.values():
+        abort(404)
+
+    directory = os.path.join(current_app.static_folder, DIST_DIR)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    chosen, encoding = filename, None
+    for name, suffix in ENCODINGS:
+        if request.accept_encodings[name] > 0 and os.path.exists(
+            os.path.join(directory, filename + suffix)
+        ):
+            chosen, encoding = filename + suffix, name
+            break
+
+    response = send_from_directory(
+        directory, chosen, mimetype=mimetype, max_age=31536000,
+        conditional=encoding is None
+    )
+    if encoding:
+        # 304s still work, but no byte ranges: they'd slice the compressed body
+        response = response.make_conditional(request, accept_ranges=False)
+        response.accept_ranges = "none"
+        response.content_encoding = encoding
+    response.headers["Cache-Control"] = IMMUTABLE
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+assets_cli = AppGroup("assets", help="Static asset pipeline.")
+
+
+@assets_cli.command("build")
+@click.option("--level", default=9, show_default=True, help="gzip level.")
+def build_command(level):
+    """Fingerprint and precompress app/static into app/static/dist."""
+    manifest = build(current_app.static_folder, level=level)
+    click.echo(
+        f"Built {len(manifest)} assets"
+        + ("" if brotli else " (install 'brotli' for .br variants)")
+    )
+
+
+def init_assets(app):
+    app.extensions["assets_manifest"] = load_manifest(app)
+    app.add_url_rule("/assets/<path:filename>", "assets", serve_asset)
+    app.jinja_env.globals["url_for"] = asset_url_for
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.cli.add_command(assets_cli)
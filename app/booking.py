@@ -0,0 +1,134 @@
+"""
+Recurring appointment series.
+
+``book_series`` books up to MAX_OCCURRENCES visits with one doctor at the
+same time every ``interval_weeks`` weeks (e.g. weekly physiotherapy). The
+whole series is checked with two set-based queries, one for the doctor's
+availability on all the dates and one for clashing bookings, and the free
+occurrences are inserted in one batched statement and committed together,
+under the slot locks from app/locks.py.
+
+Each occurrence that can't be booked comes back with a reason:
+
+    past            before now
+    unavailable     outside the doctor's availability for that date
+    doctor_booked   the doctor already has a booking at that time
+    patient_booked  the patient already has a booking at that time
+
+With ``atomic=True`` nothing is booked if any occurrence conflicts.
+"""
+
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_
+
+from app import db
+from app.locks import slot_locks
+from app.models import Appointment, Availability
+
+
+MAX_OCCURRENCES = 26
+MAX_INTERVAL_WEEKS = 4
+
+# Same slot grid as get_available_slots in app/routes/doctor_routes.py
+SLOT_DURATION = timedelta(minutes=30)
+
+Conflict = namedtuple("Conflict", "appointment_datetime reason")
+# booked: [(appointment_datetime, appointment id)], conflicts: [Conflict]
+SeriesResult = namedtuple("SeriesResult", "booked conflicts")
+
+
+def occurrences(first, count, interval_weeks=1):
+    step = timedelta(weeks=interval_weeks)
+    return [first + step * i for i in range(count)]
+
+
+def _on_grid(slot, windows):
+    """True if ``slot`` is one of the 30-minute slots of an availability window."""
+    for start, end in windows:
+        window_start = datetime.combine(slot.date(), start)
+        window_end = datetime.combine(slot.date(), end)
+        if (
+            window_start <= slot
+            and slot + SLOT_DURATION <= window_end
+            and (slot - window_start) % SLOT_DURATION == timedelta(0)
+        ):
+            return True
+    return False
+
+
+def _conflicts(patient_id, doctor_profile, slots):
+    """{slot: reason} for the slots that can't be booked."""
+    now = datetime.now()
+
+    windows = defaultdict(list)
+    for available_date, start, end in (
+        db.session.query(Availability.available_date, Availability.start_time, Availability.end_time)
+        .filter(
+            Availability.doctor_profile_id == doctor_profile.id,
+            Availability.available_date.in_({slot.date() for slot in slots})
+        )
+    ):
+        windows[available_date].append((start, end))
+
+    doctor_booked, patient_booked = set(), set()
+    for when, doctor_id, booked_patient in (
+        db.session.query(Appointment.appointment_datetime, Appointment.doctor_id, Appointment.patient_id)
+        .filter(
+            Appointment.appointment_datetime.in_(slots),
+            Appointment.status == "BOOKED",
+            or_(
+                Appointment.doctor_id == doctor_profile.user_id,
+                Appointment.patient_id == patient_id
+            )
+        )
+    ):
+        if doctor_id == doctor_profile.user_id:
+            doctor_booked.add(when)
+        if booked_patient == patient_id:
+            patient_booked.add(when)
+
+    conflicts = {}
+    for slot in slots:
+        if slot < now:
+            conflicts[slot] = "past"
+        elif not _on_grid(slot, windows[slot.date()]):
+            conflicts[slot] = "unavailable"
+        elif slot in doctor_booked:
+            conflicts[slot] = "doctor_booked"
+        elif slot in patient_booked:
+            conflicts[slot] = "patient_booked"
+    return conflicts
+
+
+def book_series(patient_id, doctor_profile, first, count, interval_weeks=1, atomic=False):
+    """Book the series in one transaction, returns a SeriesResult."""
+    slots = occurrences(first, count, interval_weeks)
+
+    with slot_locks(doctor_profile.user_id, slots):
+        conflicts = _conflicts(patient_id, doctor_profile, slots)
+        free = [slot for slot in slots if slot not in conflicts]
+
+        booked = []
+        if free and not (atomic and conflicts):
+            rows = db.session.execute(
+                insert(Appointment).returning(Appointment.id, Appointment.appointment_datetime),
+                [
+                    {
+                        "patient_id": patient_id,
+                        "doctor_id": doctor_profile.user_id,
+                        "appointment_datetime": slot,
+                        "status": "BOOKED",
+                    }
+                    for slot in free
+                ],
+            )
+            booked = sorted((when, appointment_id) for appointment_id, when in rows)
+
+        db.session.commit()
+
+    return SeriesResult(
+        booked=booked,
+        conflicts=[Conflict(slot, conflicts[slot]) for slot in slots if slot in conflicts],
+    )
@@ -0,0 +1,149 @@
+"""
+Response compression.
+
+An after_request hook that gzip- or brotli-encodes (brotli only if the
+``brotli`` package is installed) HTML, JSON and other text responses:
+
+    COMPRESSION_ENABLED         turn the hook off entirely
+    COMPRESSION_MIMETYPES       content types that get compressed
+    COMPRESSION_MIN_SIZE        smaller bodies are sent as they are
+    COMPRESSION_LEVEL           gzip level, 1 (fast) .. 9 (small)
+    COMPRESSION_BROTLI_QUALITY  brotli quality, 0 .. 11
+
+Streamed responses are compressed chunk by chunk, flushing after each one
+so the client still receives the page progressively.
+
+A compressed body is a different representation, so its ETag gets the
+encoding as a suffix ("<etag>-gzip"). ``matching_etag`` lets conditional
+views recognise their own ETag in either form.
+"""
+
+import gzip
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+
+ETAG_SUFFIXES = {"br": "-br", "gzip": "-gzip"}
+
+
+# -----------------------------
+# Encoders
+# -----------------------------
+def _gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip header
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_stream(chunks, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress(data, encoding, config):
+    if encoding == "br":
+        return brotli.compress(data, quality=config["COMPRESSION_BROTLI_QUALITY"])
+    return gzip.compress(data, compresslevel=config["COMPRESSION_LEVEL"], mtime=0)
+
+
+def compress_stream(chunks, encoding, config):
+    if encoding == "br":
+        return _brotli_stream(chunks, config["COMPRESSION_BROTLI_QUALITY"])
+    return _gzip_stream(chunks, config["COMPRESSION_LEVEL"])
+
+
+def choose_encoding():
+    """Preferred encoding the client accepts, or None."""
+    for encoding in ("br", "gzip") if brotli else ("gzip",):
+        if request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+# -----------------------------
+# ETags
+# -----------------------------
+def matching_etag(if_none_match, etag):
+    """The form of ``etag`` (plain or encoding-suffixed) the client sent, or None."""
+    if if_none_match.star_tag:
+        return etag
+
+    for candidate in [etag] + [etag + suffix for suffix in ETAG_SUFFIXES.values()]:
+        if if_none_match.contains(candidate):
+            return candidate
+    return None
+
+
+def not_modified():
+    """
+    A 304 for a response compress_response may have encoded. It carries
+    the same Vary as the 200, so shared caches keep the variants apart.
+    """
+    response = current_app.response_class(status=304)
+    if current_app.config["COMPRESSION_ENABLED"]:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+# -----------------------------
+# Hook
+# -----------------------------
+def compress_response(response):
+    config = current_app.config
+
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in config["COMPRESSION_MIMETYPES"]
+        or response.cache_control.no_transform
+    ):
+        return response
+
+    if not response.is_streamed and response.content_length is not None \
+            and response.content_length < config["COMPRESSION_MIN_SIZE"]:
+        return response
+
+    # The body now depends on Accept-Encoding, whether or not we compress
+    response.vary.add("Accept-Encoding")
+
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, config)
+        response.headers.pop("Content-Length", None)
+    else:
+        response.set_data(compress(response.get_data(), encoding, config))
+
+    response.content_encoding = encoding
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag + ETAG_SUFFIXES[encoding], weak)
+
+    return response
+
+
+def init_compression(app):
+    if app.config["COMPRESSION_ENABLED"]:
+        app.after_request(compress_response)
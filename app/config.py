@@ -0,0 +1,141 @@
+import json
+import os
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+# =========================
+# Base Configuration
+# =========================
+class Config:
+    SECRET_KEY = os.environ.get("SECRET_KEY", "dev_secret_key")
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        "DATABASE_URL", "sqlite:///hospital.db"
+    )
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Set by the flask CLI, so "flask db ..." works without paying for
+    # Alembic in web workers
+    MIGRATIONS_ENABLED = os.environ.get("FLASK_RUN_FROM_CLI") == "true"
+
+    # Engine tuning (see app/database.py)
+    DB_POOL_SIZE = _env_int("DB_POOL_SIZE", _env_int("GUNICORN_THREADS", 4) + 1)
+    DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", _env_int("GUNICORN_THREADS", 4))
+    DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 10)
+    DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+    DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS = _env_int("DB_STATEMENT_TIMEOUT_MS", 15000)
+
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+    SQLITE_MMAP_SIZE = _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+
+    # Read replica (see app/database.py)
+    SQLALCHEMY_REPLICA_URI = os.environ.get("DATABASE_REPLICA_URL")
+    REPLICA_READ_YOUR_WRITES_SECONDS = _env_int("REPLICA_READ_YOUR_WRITES_SECONDS", 10)
+
+    # Hospital tenants (see app/tenancy.py). TENANT_BINDS maps a tenant's
+    # bind key to the URL of its own database, as JSON
+    DEFAULT_TENANT = os.environ.get("DEFAULT_TENANT", "default")
+    TENANT_BINDS = json.loads(os.environ.get("TENANT_BINDS") or "{}")
+
+    # Booking slot locks (see app/locks.py): auto, postgres, sqlite or local
+    BOOKING_LOCK_BACKEND = os.environ.get("BOOKING_LOCK_BACKEND", "auto")
+    BOOKING_LOCK_TIMEOUT = float(os.environ.get("BOOKING_LOCK_TIMEOUT", 5))
+
+    # Idempotency keys for form submissions (see app/idempotency.py)
+    IDEMPOTENCY_KEY_TTL_HOURS = _env_int("IDEMPOTENCY_KEY_TTL_HOURS", 24)
+    IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", 5))
+
+    # Doctors' calendar feeds (see app/ical.py)
+    CALENDAR_FEED_HORIZON_DAYS = _env_int("CALENDAR_FEED_HORIZON_DAYS", 90)
+    CALENDAR_FEED_MAX_EVENTS = _env_int("CALENDAR_FEED_MAX_EVENTS", 1000)
+    CALENDAR_FEED_MAX_AGE = _env_int("CALENDAR_FEED_MAX_AGE", 300)
+
+    # Appointment reminders (see app/reminders.py)
+    REMINDER_LEAD_HOURS = _env_int("REMINDER_LEAD_HOURS", 24)
+    REMINDER_BATCH_SIZE = _env_int("REMINDER_BATCH_SIZE", 1000)
+    REMINDER_SCHEDULER_ENABLED = os.environ.get("REMINDER_SCHEDULER_ENABLED", "false").lower() == "true"
+    REMINDER_INTERVAL_SECONDS = _env_int("REMINDER_INTERVAL_SECONDS", 300)
+
+    # No-show expiry (see app/appointments.py)
+    NO_SHOW_GRACE_HOURS = _env_int("NO_SHOW_GRACE_HOURS", 24)
+    NO_SHOW_BATCH_SIZE = _env_int("NO_SHOW_BATCH_SIZE", 1000)
+
+    # Doctor leave: longest range cancelled at once
+    LEAVE_MAX_DAYS = _env_int("LEAVE_MAX_DAYS", 31)
+
+    # Password hashing (see app/passwords.py)
+    BCRYPT_LOG_ROUNDS = _env_int("BCRYPT_LOG_ROUNDS", 12)
+    BCRYPT_ROUNDS_BY_ROLE = {
+        role: int(os.environ[f"BCRYPT_ROUNDS_{role.upper()}"])
+        for role in ("admin", "doctor", "patient")
+        if os.environ.get(f"BCRYPT_ROUNDS_{role.upper()}")
+    }
+    PASSWORD_POOL_WORKERS = _env_int("PASSWORD_POOL_WORKERS", 2)
+    PASSWORD_POOL_MAX_QUEUE = _env_int("PASSWORD_POOL_MAX_QUEUE", 16)
+    PASSWORD_POOL_QUEUE_WAIT = float(os.environ.get("PASSWORD_POOL_QUEUE_WAIT", 0))
+    PASSWORD_POOL_TIMEOUT = float(os.environ.get("PASSWORD_POOL_TIMEOUT", 10))
+
+    # Template fragment cache (see app/fragment_cache.py)
+    FRAGMENT_CACHE_ENABLED = os.environ.get("FRAGMENT_CACHE_ENABLED", "true").lower() == "true"
+    FRAGMENT_CACHE_MAX_ENTRIES = _env_int("FRAGMENT_CACHE_MAX_ENTRIES", 2000)
+    FRAGMENT_CACHE_DEFAULT_TTL = _env_int("FRAGMENT_CACHE_DEFAULT_TTL", 300)
+    FRAGMENT_CACHE_RECHECK_SECONDS = _env_int("FRAGMENT_CACHE_RECHECK_SECONDS", 5)
+
+    # Departments / doctor directory cache (see app/reference.py)
+    REFERENCE_CACHE_RECHECK_SECONDS = _env_int("REFERENCE_CACHE_RECHECK_SECONDS", 30)
+
+    # Response compression (see app/compression.py)
+    COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIMETYPES = {
+        "text/html",
+        "text/plain",
+        "text/css",
+        "text/csv",
+        "text/calendar",
+        "application/json",
+        "application/javascript",
+        "image/svg+xml",
+    }
+    COMPRESSION_MIN_SIZE = _env_int("COMPRESSION_MIN_SIZE", 500)
+    COMPRESSION_LEVEL = _env_int("COMPRESSION_LEVEL", 6)
+    COMPRESSION_BROTLI_QUALITY = _env_int("COMPRESSION_BROTLI_QUALITY", 4)
+
+    # Jinja bytecode cache (see app/template_cache.py)
+    TEMPLATE_BYTECODE_CACHE = os.environ.get("TEMPLATE_BYTECODE_CACHE", "true").lower() == "true"
+    TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get("TEMPLATE_BYTECODE_CACHE_DIR")
+
+
+# =========================
+# Profiles
+# =========================
+class DevelopmentConfig(Config):
+    DEBUG = True
+    PASSWORD_POOL_WORKERS = _env_int("PASSWORD_POOL_WORKERS", 0)
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URL", "sqlite://")
+    WTF_CSRF_ENABLED = False
+    BCRYPT_LOG_ROUNDS = 4
+    BCRYPT_ROUNDS_BY_ROLE = {}
+    PASSWORD_POOL_WORKERS = 0
+    FRAGMENT_CACHE_ENABLED = False
+    REFERENCE_CACHE_RECHECK_SECONDS = 0
+    TEMPLATE_BYTECODE_CACHE = False
+
+
+class ProductionConfig(Config):
+    DEBUG = False
+
+
+config_by_name = {
+    "development": DevelopmentConfig,
+    "testing": TestingConfig,
+    "production": ProductionConfig,
+}
@@ -0,0 +1,195 @@
+"""
+Database engine tuning.
+
+Builds SQLALCHEMY_ENGINE_OPTIONS from the DB_* config keys and, for SQLite,
+applies the SQLITE_* pragmas on every new connection:
+
+    DB_POOL_SIZE / DB_MAX_OVERFLOW   pool per worker (defaults follow
+                                     GUNICORN_THREADS)
+    DB_POOL_TIMEOUT                  seconds to wait for a pooled connection
+    DB_POOL_RECYCLE                  recycle connections older than this
+    DB_POOL_PRE_PING                 test connections on checkout
+    DB_STATEMENT_TIMEOUT_MS          per-statement timeout (Postgres)
+
+    SQLITE_JOURNAL_MODE              WAL lets readers run alongside a writer
+    SQLITE_SYNCHRONOUS               NORMAL is safe with WAL and much faster
+    SQLITE_BUSY_TIMEOUT_MS           wait this long on a locked database
+    SQLITE_MMAP_SIZE                 bytes of the file to memory-map
+
+It also routes read-only requests to a replica when SQLALCHEMY_REPLICA_URI
+is set. Views marked with ``@read_only`` (app/routes/decorators.py) read
+from the replica on GET/HEAD, unless the browser session wrote something
+within REPLICA_READ_YOUR_WRITES_SECONDS. Flushes and DML always go to the
+primary.
+
+Tenants with their own database (TENANT_BINDS, see app/tenancy.py) get
+every query routed to that engine instead, except for the global tables.
+"""
+
+import time
+
+import sqlalchemy as sa
+from flask import g, has_app_context, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+REPLICA_BIND_KEY = "replica"
+GLOBAL_TABLES = {"tenant", "resource_version"}
+LAST_WRITE_SESSION_KEY = "_db_last_write"
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def is_memory_sqlite(uri):
+    url = make_url(uri)
+    return is_sqlite(uri) and url.database in (None, "", ":memory:")
+
+
+def engine_options(config, uri):
+    """Engine kwargs for ``uri`` derived from the app config."""
+    options = {
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+
+    if is_sqlite(uri):
+        # SQLite gets its concurrency from pragmas, not pool sizing
+        return options
+
+    options.update(
+        pool_size=config["DB_POOL_SIZE"],
+        max_overflow=config["DB_MAX_OVERFLOW"],
+        pool_timeout=config["DB_POOL_TIMEOUT"],
+        pool_recycle=config["DB_POOL_RECYCLE"],
+    )
+
+    timeout = config.get("DB_STATEMENT_TIMEOUT_MS")
+    if timeout and make_url(uri).get_backend_name() == "postgresql":
+        options["connect_args"] = {"options": f"-c statement_timeout={int(timeout)}"}
+
+    return options
+
+
+def sqlite_pragmas(config, uri):
+    pragmas = {
+        "synchronous": config["SQLITE_SYNCHRONOUS"],
+        "busy_timeout": config["SQLITE_BUSY_TIMEOUT_MS"],
+        "mmap_size": config["SQLITE_MMAP_SIZE"],
+    }
+
+    # In-memory databases can't use WAL
+    if not is_memory_sqlite(uri):
+        pragmas = {"journal_mode": config["SQLITE_JOURNAL_MODE"], **pragmas}
+
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def init_engine_options(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS and binds, call before db.init_app."""
+    options = engine_options(app.config, app.config["SQLALCHEMY_DATABASE_URI"])
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+    replica_uri = app.config.get("SQLALCHEMY_REPLICA_URI")
+    if replica_uri:
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        binds[REPLICA_BIND_KEY] = {
+            "url": replica_uri,
+            **engine_options(app.config, replica_uri),
+        }
+        app.config["SQLALCHEMY_BINDS"] = binds
+
+    tenant_binds = app.config.get("TENANT_BINDS") or {}
+    if tenant_binds:
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        for key, uri in tenant_binds.items():
+            binds[key] = {"url": uri, **engine_options(app.config, uri)}
+        app.config["SQLALCHEMY_BINDS"] = binds
+
+
+def register_sqlite_pragmas(app, db):
+    """Apply SQLite pragmas on connect, call after db.init_app."""
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name != "sqlite":
+                continue
+
+            pragmas = sqlite_pragmas(app.config, str(engine.url))
+
+            @event.listens_for(engine, "connect")
+            def set_pragmas(dbapi_connection, connection_record, pragmas=pragmas):
+                cursor = dbapi_connection.cursor()
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+                cursor.close()
+
+
+# -----------------------------
+# Read-replica and tenant routing
+# -----------------------------
+def use_replica():
+    return has_app_context() and g.get("use_read_replica", False)
+
+
+def tenant_bind():
+    return g.get("tenant_bind") if has_app_context() else None
+
+
+def wrote_recently(window):
+    last_write = session.get(LAST_WRITE_SESSION_KEY, 0)
+    return time.time() - last_write < window
+
+
+class RoutingSession(Session):
+    """
+    Sends everything to the tenant's own engine when it has one, otherwise
+    reads to the replica engine while ``g.use_read_replica`` is set.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        key = tenant_bind()
+        if (
+            bind is None
+            and key
+            and not (mapper is not None and mapper.local_table.name in GLOBAL_TABLES)
+        ):
+            return self._db.engines[key]
+
+        if (
+            bind is None
+            and not self._flushing
+            and not isinstance(clause, sa.UpdateBase)
+            and use_replica()
+        ):
+            engine = self._db.engines.get(REPLICA_BIND_KEY)
+            if engine is not None:
+                return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _mark_write():
+    if has_request_context():
+        g.db_wrote = True
+        g.use_read_replica = False
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(db_session, flush_context):
+    _mark_write()
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _after_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write()
+
+
+def remember_writes(response):
+    """after_request hook: start the read-your-writes window."""
+    if g.get("db_wrote"):
+        session[LAST_WRITE_SESSION_KEY] = time.time()
+    return response
@@ -1,3 +1,6 @@
+from datetime import date
+
+from flask import current_app
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, BooleanField, DateField, TimeField, SelectField, TextAreaField, FieldList, FormField, IntegerField, HiddenField
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError, NumberRange, Optional
@@ -159,4 +162,21 @@ class ChangePasswordForm(FlaskForm):
         ]
     )
 
-    submit = SubmitField("Update Password")    
\ No newline at end of file
+    submit = SubmitField("Update Password")    
+
+
+class LeaveForm(FlaskForm):
+    start_date = DateField('From', format='%Y-%m-%d', validators=[DataRequired()])
+    end_date = DateField('To', format='%Y-%m-%d', validators=[DataRequired()])
+    reason = StringField('Reason', validators=[Optional(), Length(max=100)], render_kw={"placeholder": "e.g., Conference"})
+    submit = SubmitField('Cancel Appointments and Go on Leave')
+
+    def validate_start_date(self, start_date):
+        if start_date.data < date.today():
+            raise ValidationError('Leave cannot start in the past.')
+
+    def validate_end_date(self, end_date):
+        if self.start_date.data and end_date.data < self.start_date.data:
+            raise ValidationError('Leave must end on or after its first day.')
+        if self.start_date.data and (end_date.data - self.start_date.data).days >= current_app.config['LEAVE_MAX_DAYS']:
+            raise ValidationError(f"Leave can be at most {current_app.config['LEAVE_MAX_DAYS']} days at a time.")
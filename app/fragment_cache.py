@@ -0,0 +1,207 @@
+"""
+Jinja fragment caching.
+
+    {% cache "patient-departments", 600, tags=["department"] %}
+        ... expensive markup ...
+    {% endcache %}
+
+Rendered fragments are kept in a per-process LRU with a TTL. Tags name the
+data a fragment depends on, either a whole table ("department") or one row
+("department:3"). When a transaction commits, the tables and rows it wrote
+(see ``tables_changed`` in app/versioning.py) invalidate the matching tags.
+Other workers notice at most FRAGMENT_CACHE_RECHECK_SECONDS later: before
+a lookup, each process compares the version stamps of the tables its tags
+name and drops the fragments of any table that changed (whole table, as
+the stamps don't say which rows). Keys are stored per tenant (see
+app/tenancy.py), so templates never need to add the tenant.
+
+Config: FRAGMENT_CACHE_ENABLED, FRAGMENT_CACHE_MAX_ENTRIES,
+FRAGMENT_CACHE_DEFAULT_TTL, FRAGMENT_CACHE_RECHECK_SECONDS. Hit ratio is
+exposed by ``stats()``.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from app.tenancy import current_tenant_id
+from app.versioning import get_versions, tables_changed
+
+
+class FragmentCache:
+
+    def __init__(self, max_entries=1000, recheck_seconds=5):
+        self.max_entries = max_entries
+        self.recheck_seconds = recheck_seconds
+        self._entries = OrderedDict()   # key -> (expires_at, value, tags)
+        self._tags = {}                 # tag -> set of keys
+        self._seen = {}                 # table -> version stamp last seen
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def sync(self):
+        """Drop fragments of tables other processes wrote (see module docstring)."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.recheck_seconds:
+            return
+        self._checked_at = now
+
+        with self._lock:
+            tables = {tag.partition(":")[0] for tag in self._tags}
+        if not tables:
+            return
+
+        versions = get_versions(tables)
+        for table in tables:
+            version = versions.get(table, (0, None))[0]
+            if self._seen.get(table) != version:
+                self._seen[table] = version
+                self.invalidate(table)
+                self.invalidate_prefix(f"{table}:")
+
+    def invalidate(self, *tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            tags = [tag for tag in self._tags if tag.startswith(prefix)]
+        self.invalidate(*tags)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+        }
+
+
+# -----------------------------
+# Jinja extension
+# -----------------------------
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        key = parser.parse_expression()
+        ttl = nodes.Const(None)
+        tags = nodes.List([])
+
+        while parser.stream.skip_if("comma"):
+            if parser.stream.current.type == "name" and parser.stream.look().type == "assign":
+                name = parser.stream.expect("name").value
+                parser.stream.expect("assign")
+                if name != "tags":
+                    parser.fail(f"unknown cache argument '{name}'", lineno)
+                tags = parser.parse_expression()
+            else:
+                ttl = parser.parse_expression()
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+
+        return nodes.CallBlock(
+            self.call_method("_render", [key, ttl, tags]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, key, ttl, tags, caller):
+        cache = current_app.extensions.get("fragment_cache")
+        if cache is None:
+            return caller()
+
+        cache.sync()
+        key = f"{current_tenant_id()}:{key}"
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            ttl = ttl or current_app.config["FRAGMENT_CACHE_DEFAULT_TTL"]
+            cache.set(key, value, ttl, [str(tag) for tag in tags])
+
+        return value
+
+
+# -----------------------------
+# Invalidation on model writes
+# -----------------------------
+@tables_changed.connect
+def _invalidate(app, changes, **extra):
+    cache = app.extensions.get("fragment_cache")
+    if cache is None:
+        return
+
+    for table, rows in changes.items():
+        cache.invalidate(table)
+
+        if rows is None:
+            cache.invalidate_prefix(f"{table}:")
+        else:
+            cache.invalidate(*(f"{table}:{pk}" for pk in rows))
+
+
+def init_fragment_cache(app):
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+    if app.config["FRAGMENT_CACHE_ENABLED"]:
+        app.extensions["fragment_cache"] = FragmentCache(
+            app.config["FRAGMENT_CACHE_MAX_ENTRIES"],
+            app.config["FRAGMENT_CACHE_RECHECK_SECONDS"]
+        )
+
+
+def stats():
+    cache = current_app.extensions.get("fragment_cache")
+    return cache.stats() if cache else {"enabled": False}
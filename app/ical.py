@@ -0,0 +1,192 @@
+"""
+iCalendar (.ics) feeds of doctors' upcoming appointments.
+
+Calendar apps can't sign in, so each doctor gets a feed URL carrying a
+token (``feed_token``): their user id, signed with SECRET_KEY and a
+random per-user ``calendar_feed_secret``. The doctor creates (or replaces)
+the secret from their profile page (``reset_feed_secret``); changing the
+password clears it, which retires the old URL.
+
+Calendar apps poll often. The ETag comes from one aggregate over the
+doctor's booked appointments in the window (count and latest
+``updated_at``), so a poll costs one indexed query and gets a 304 unless
+those bookings changed. The feed itself is built from one more query and
+kept in the fragment cache under that ETag.
+
+Only BOOKED appointments from today up to CALENDAR_FEED_HORIZON_DAYS
+ahead are included, at most CALENDAR_FEED_MAX_EVENTS of them.
+"""
+
+import hashlib
+import secrets
+from datetime import date, datetime, timedelta
+
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import func
+
+from app import db
+from app.models import Appointment, PatientProfile
+from app.tenancy import current_tenant_id
+
+
+SALT = "calendar-feed"
+SLOT_DURATION = timedelta(minutes=30)
+PRODID = "-//HealNest//Doctor Schedule//EN"
+
+
+# -----------------------------
+# Tokens
+# -----------------------------
+def _serializer(feed_secret=""):
+    return URLSafeSerializer(current_app.config["SECRET_KEY"], salt=f"{SALT}:{feed_secret}")
+
+
+def feed_token(user):
+    """The user's feed token, None until they have a feed secret."""
+    if not user.calendar_feed_secret:
+        return None
+    return _serializer(user.calendar_feed_secret).dumps(user.id)
+
+
+def reset_feed_secret(user):
+    """Give the user a new feed secret, retiring any earlier token."""
+    user.calendar_feed_secret = secrets.token_urlsafe(16)
+
+
+def load_token(token, load_user):
+    """The user a token was issued to, or None if invalid or retired."""
+    # Read the user id first; the signature is checked with their secret
+    _, user_id = _serializer().loads_unsafe(token)
+    if not isinstance(user_id, int) or isinstance(user_id, bool):
+        return None
+
+    user = load_user(user_id)
+    if user is None or not user.calendar_feed_secret:
+        return None
+
+    try:
+        _serializer(user.calendar_feed_secret).loads(token)
+    except BadSignature:
+        return None
+    return user
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def window():
+    start = datetime.combine(date.today(), datetime.min.time())
+    return start, start + timedelta(days=current_app.config["CALENDAR_FEED_HORIZON_DAYS"])
+
+
+def _in_window(doctor_id, start, end):
+    return (
+        Appointment.doctor_id == doctor_id,
+        Appointment.status == "BOOKED",
+        Appointment.appointment_datetime >= start,
+        Appointment.appointment_datetime < end,
+    )
+
+
+def feed_etag(doctor_id):
+    start, end = window()
+
+    count, latest = db.session.query(
+        func.count(Appointment.id),
+        func.max(func.coalesce(Appointment.updated_at, Appointment.created_at)),
+    ).filter(*_in_window(doctor_id, start, end)).one()
+
+    parts = [
+        current_tenant_id(),
+        doctor_id,
+        start.date(),
+        current_app.config["CALENDAR_FEED_HORIZON_DAYS"],
+        current_app.config["CALENDAR_FEED_MAX_EVENTS"],
+        count,
+        latest,
+    ]
+    return hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
+def _events(doctor_id):
+    start, end = window()
+
+    return (
+        db.session.query(
+            Appointment.id,
+            Appointment.appointment_datetime,
+            func.coalesce(Appointment.updated_at, Appointment.created_at),
+            PatientProfile.full_name,
+        )
+        .outerjoin(PatientProfile, PatientProfile.user_id == Appointment.patient_id)
+        .filter(*_in_window(doctor_id, start, end))
+        .order_by(Appointment.appointment_datetime)
+        .limit(current_app.config["CALENDAR_FEED_MAX_EVENTS"])
+    )
+
+
+# -----------------------------
+# Rendering
+# -----------------------------
+def _escape(text):
+    return (
+        str(text)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """Split content lines longer than 75 octets (RFC 5545, 3.1)."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+
+    parts, current = [], b""
+    for char in line:
+        piece = char.encode("utf-8")
+        if len(current) + len(piece) > (75 if not parts else 74):
+            parts.append(current.decode("utf-8"))
+            current = b""
+        current += piece
+    parts.append(current.decode("utf-8"))
+    return "\r\n ".join(parts)
+
+
+def _stamp(value):
+    # Appointment times are local ("floating"), updated_at stamps are UTC
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def render_feed(doctor):
+    name = doctor.doctor_profile.full_name if doctor.doctor_profile else doctor.email
+    calendar_name = f"HealNest - Dr. {name}"
+    host = request.host.partition(":")[0]
+
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(calendar_name)}",
+    ]
+
+    for appointment_id, when, changed, patient_name in _events(doctor.id):
+        summary = f"Appointment: {patient_name or 'Patient'}"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:appointment-{appointment_id}@{host}",
+            f"DTSTAMP:{_stamp(changed or datetime.utcnow())}Z",
+            f"DTSTART:{_stamp(when)}",
+            f"DTEND:{_stamp(when + SLOT_DURATION)}",
+            f"SUMMARY:{_escape(summary)}",
+            "STATUS:CONFIRMED",
+            "END:VEVENT",
+        ]
+
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_fold(line) for line in lines) + "\r\n"
@@ -0,0 +1,183 @@
+"""
+Idempotency keys for form submissions.
+
+Forms that write (booking, cancelling, treating) carry a one-off key,
+rendered by ``{{ idempotency_field() }}``; API clients can send an
+``Idempotency-Key`` header instead. The first request with a key claims it
+and, once the view has redirected, stores the outcome: the redirect and
+the messages it flashed. A double-click or a retry with the same key gets
+that outcome back straight away, without running the view or touching
+appointment rows. A retry that arrives while the first request is still
+running waits up to IDEMPOTENCY_WAIT_SECONDS for its outcome. A key is
+bound to the URL it was first used on; reusing it on another one (say, to
+cancel a different appointment) is answered with 422 rather than the
+other request's outcome.
+
+Outcomes are kept for IDEMPOTENCY_KEY_TTL_HOURS, and
+``flask idempotency sweep`` deletes older keys.
+
+Keys are read and written on their own short connection, so claiming a
+key never commits or expires anything in the view's session. See
+``idempotent`` in app/routes/decorators.py.
+"""
+
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import click
+import sqlalchemy as sa
+from flask import current_app, request
+from flask.cli import AppGroup
+from markupsafe import Markup
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import IdempotencyKey
+
+
+FORM_FIELD = "idempotency_key"
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 64
+SWEEP_BATCH = 5000
+POLL_INTERVAL = 0.1
+
+table = IdempotencyKey.__table__
+
+
+def idempotency_field():
+    """Hidden input with a fresh key, for forms posting to @idempotent views."""
+    return Markup(f'<input type="hidden" name="{FORM_FIELD}" value="{uuid.uuid4().hex}">')
+
+
+def request_key():
+    key = request.headers.get(HEADER) or request.form.get(FORM_FIELD)
+    if key and len(key) <= MAX_KEY_LENGTH:
+        return key
+    return None
+
+
+def _engine():
+    # The tenant's own database when it has one (see app/tenancy.py)
+    return db.session.get_bind(mapper=sa.inspect(IdempotencyKey))
+
+
+def _cutoff():
+    return datetime.utcnow() - timedelta(hours=current_app.config["IDEMPOTENCY_KEY_TTL_HOURS"])
+
+
+def _match(user_id, endpoint, key):
+    return sa.and_(
+        table.c.user_id == user_id,
+        table.c.endpoint == endpoint,
+        table.c.key == key,
+    )
+
+
+# -----------------------------
+# Store
+# -----------------------------
+def claim(user_id, endpoint, key, path):
+    """
+    Claim ``key`` for this request to ``path``.
+
+    Returns None when the caller should run the view, otherwise the stored
+    outcome row (``status_code`` is None while the first request is still
+    running and did not finish within IDEMPOTENCY_WAIT_SECONDS). A row for
+    a different path is returned straight away, see ``reused``.
+    """
+    engine = _engine()
+    deadline = time.monotonic() + current_app.config["IDEMPOTENCY_WAIT_SECONDS"]
+
+    while True:
+        try:
+            with engine.begin() as conn:
+                conn.execute(table.insert().values(
+                    user_id=user_id,
+                    endpoint=endpoint,
+                    key=key,
+                    path=path,
+                    created_at=datetime.utcnow(),
+                ))
+            return None
+        except IntegrityError:
+            pass
+
+        with engine.begin() as conn:
+            row = conn.execute(
+                sa.select(table).where(_match(user_id, endpoint, key))
+            ).first()
+
+            if row is not None and row.created_at < _cutoff():
+                # Expired but not swept yet: start over with this key
+                conn.execute(table.delete().where(table.c.id == row.id))
+                continue
+
+        if row is None:
+            continue  # released by a failed request, claim it again
+
+        if reused(row, path) or row.status_code is not None or time.monotonic() >= deadline:
+            return row
+
+        time.sleep(POLL_INTERVAL)
+
+
+def reused(row, path):
+    """Whether the key in ``row`` was first used on another URL."""
+    # Keys claimed before paths were stored have none
+    return bool(row.path) and row.path != path
+
+
+def complete(user_id, endpoint, key, status_code, location, messages):
+    with _engine().begin() as conn:
+        conn.execute(
+            table.update()
+            .where(_match(user_id, endpoint, key))
+            .values(
+                status_code=status_code,
+                location=location,
+                messages=json.dumps(messages),
+            )
+        )
+
+
+def release(user_id, endpoint, key):
+    """Forget a claim whose request didn't produce a replayable outcome."""
+    with _engine().begin() as conn:
+        conn.execute(table.delete().where(_match(user_id, endpoint, key)))
+
+
+def sweep(engine, cutoff, batch_size=SWEEP_BATCH):
+    deleted = 0
+    while True:
+        with engine.begin() as conn:
+            ids = sa.select(table.c.id).where(table.c.created_at < cutoff).limit(batch_size)
+            count = conn.execute(
+                table.delete().where(table.c.id.in_(ids.scalar_subquery()))
+            ).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def init_idempotency(app):
+    app.jinja_env.globals["idempotency_field"] = idempotency_field
+    app.cli.add_command(idempotency_cli)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+idempotency_cli = AppGroup("idempotency", help="Idempotency keys.")
+
+
+@idempotency_cli.command("sweep")
+def sweep_command():
+    """Delete keys older than IDEMPOTENCY_KEY_TTL_HOURS."""
+    engines = {"primary": db.engine}
+    engines.update({key: db.engines[key] for key in current_app.config["TENANT_BINDS"]})
+
+    cutoff = _cutoff()
+    for name, engine in engines.items():
+        click.echo(f"{name}: deleted {sweep(engine, cutoff)} keys")
@@ -0,0 +1,176 @@
+"""
+Booking slot locks.
+
+Two patients booking the same doctor and time used to race between the
+"is it free?" SELECT and the INSERT. ``slot_lock`` serialises that section
+per ``(doctor_id, slot)``, so a contended slot waits briefly while bookings
+for other slots run in parallel:
+
+    with slot_lock(doctor_id, appointment_datetime):
+        ... check the slot is free, insert, commit ...
+
+``slot_locks`` takes several slots of one doctor at once (series booking).
+
+Backends (BOOKING_LOCK_BACKEND, "auto" picks by database):
+
+    postgres   pg_advisory_xact_lock on the booking transaction, held
+               until it commits or rolls back, across every worker/node
+    sqlite     a per-key lock in this process, then BEGIN IMMEDIATE, which
+               takes SQLite's single write lock for the rest of the
+               transaction (other processes queue on busy_timeout)
+    local      per-key lock in this process only, for single-worker
+               deployments and tests
+    none       no locking, the old behaviour (for benchmarks)
+
+The commit must happen inside the ``with`` block. Waiting longer than
+BOOKING_LOCK_TIMEOUT seconds raises ``SlotBusy``; roll the session back
+before retrying.
+"""
+
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+
+from app import db, models
+
+
+EPOCH = datetime(1970, 1, 1)
+STRIPES = 1024
+
+
+class SlotBusy(RuntimeError):
+    """Raised when a slot lock can't be taken within the timeout."""
+
+
+def _slot_minutes(slot):
+    return int((slot - EPOCH).total_seconds() // 60)
+
+
+# -----------------------------
+# In-process locks
+# -----------------------------
+# A fixed set of lock stripes, so the table never grows with the number of
+# slots. Two unrelated slots share a stripe 1 time in STRIPES.
+_stripes = [threading.Lock() for _ in range(STRIPES)]
+
+
+def _stripe(key):
+    return zlib.crc32(repr(key).encode()) % STRIPES
+
+
+@contextmanager
+def _local_locks(keys, timeout):
+    # Stripes are taken in index order, so callers locking several slots
+    # can't deadlock each other, and each at most once
+    acquired = []
+    try:
+        for index in sorted({_stripe(key) for key in keys}):
+            if not _stripes[index].acquire(timeout=timeout):
+                raise SlotBusy(keys)
+            acquired.append(index)
+        yield
+    finally:
+        for index in reversed(acquired):
+            _stripes[index].release()
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+@contextmanager
+def _postgres_lock(connection, doctor_id, minutes, timeout):
+    # Transaction-scoped: released by the commit/rollback, never leaked
+    # back to the pool with the connection. Taken in order, like the
+    # in-process stripes.
+    connection.exec_driver_sql(f"SET LOCAL lock_timeout = '{int(timeout * 1000)}ms'")
+    try:
+        for minute in sorted(set(minutes)):
+            connection.execute(
+                sa.text("SELECT pg_advisory_xact_lock(:doctor_id, :minute)"),
+                {"doctor_id": doctor_id, "minute": minute},
+            )
+    except OperationalError as error:
+        raise SlotBusy((doctor_id, minutes)) from error
+
+    connection.exec_driver_sql("SET LOCAL lock_timeout = DEFAULT")
+    yield
+
+
+def _keys(connection, doctor_id, minutes):
+    url = str(connection.engine.url)
+    return [(url, doctor_id, minute) for minute in minutes]
+
+
+@contextmanager
+def _sqlite_lock(connection, doctor_id, minutes, timeout):
+    keys = _keys(connection, doctor_id, minutes)
+
+    with _local_locks(keys, timeout):
+        # pysqlite only opens a transaction before DML, so a request that
+        # has just read still has none and can start a write transaction
+        if not connection.connection.dbapi_connection.in_transaction:
+            try:
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+            except OperationalError as error:
+                raise SlotBusy(keys) from error
+        yield
+
+
+@contextmanager
+def _local_backend(connection, doctor_id, minutes, timeout):
+    with _local_locks(_keys(connection, doctor_id, minutes), timeout):
+        yield
+
+
+@contextmanager
+def _no_lock(connection, doctor_id, minutes, timeout):
+    yield
+
+
+BACKENDS = {
+    "postgres": _postgres_lock,
+    "sqlite": _sqlite_lock,
+    "local": _local_backend,
+    "none": _no_lock,
+}
+
+AUTO_BACKENDS = {
+    "postgresql": "postgres",
+    "sqlite": "sqlite",
+}
+
+
+def backend_name(connection):
+    name = current_app.config["BOOKING_LOCK_BACKEND"]
+    if name == "auto":
+        name = AUTO_BACKENDS.get(connection.dialect.name, "local")
+    return name
+
+
+@contextmanager
+def slot_lock(doctor_id, slot, timeout=None):
+    """Hold the booking lock for ``doctor_id`` at ``slot`` (a datetime)."""
+    with slot_locks(doctor_id, [slot], timeout):
+        yield
+
+
+@contextmanager
+def slot_locks(doctor_id, slots, timeout=None):
+    """Hold the booking locks for several of ``doctor_id``'s slots at once."""
+    if timeout is None:
+        timeout = current_app.config["BOOKING_LOCK_TIMEOUT"]
+
+    # The connection appointments are written through (the tenant's own
+    # database when it has one)
+    connection = db.session.connection(
+        bind_arguments={"mapper": sa.inspect(models.Appointment)}
+    )
+    backend = BACKENDS[backend_name(connection)]
+
+    with backend(connection, doctor_id, [_slot_minutes(slot) for slot in slots], timeout):
+        yield
@@ -3,7 +3,9 @@ from flask import current_app
 from flask_login import UserMixin
 from itsdangerous import URLSafeTimedSerializer as Serializer
 from sqlalchemy.orm import relationship
-from app import db, login_manager, bcrypt
+from app import db, login_manager
+from app.passwords import hasher, needs_rehash
+from app.tenancy import TenantScoped
 
 
 # -----------------------------
@@ -11,13 +13,36 @@ from app import db, login_manager, bcrypt
 # -----------------------------
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Blacklisted and deleted users are signed out on their next request
+    user = User.query.get(int(user_id))
+    if user is None or not user.is_active or user.is_deleted:
+        return None
+    return user
+
+
+# -----------------------------
+# Tenant (hospital branch, see app/tenancy.py)
+# -----------------------------
+class Tenant(db.Model):
+    __tablename__ = "tenant"
+
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(120), nullable=False)
+
+    # Requests for this host resolve to the tenant
+    hostname = db.Column(db.String(255), unique=True)
+
+    # TENANT_BINDS key when the tenant has its own database
+    bind_key = db.Column(db.String(50))
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
 # -----------------------------
 # User Model
 # -----------------------------
-class User(db.Model, UserMixin):
+class User(db.Model, UserMixin, TenantScoped):
     __tablename__ = "user"
 
     id = db.Column(db.Integer, primary_key=True)
@@ -57,12 +82,16 @@ class User(db.Model, UserMixin):
 
     must_change_password = db.Column(db.Boolean, default=False)
 
+    # Signs calendar feed URLs (see app/ical.py), reset with the password
+    calendar_feed_secret = db.Column(db.String(32))
+
 
     __table_args__ = (
         db.CheckConstraint(
             "role IN ('admin', 'doctor', 'patient')",
             name="check_valid_role"
         ),
+        db.Index("ix_user_tenant_role", "tenant_id", "role"),
     )
 
     doctor_profile = db.relationship(
@@ -86,17 +115,22 @@ class User(db.Model, UserMixin):
     )
 
    # ---------- Password handling (bcrypt only) ----------
+    # Hashing runs in the password pool (see app/passwords.py), with the
+    # cost configured for this user's role.
 
     def set_password(self, raw_password):
-        self.password_hash = bcrypt.generate_password_hash(
-        raw_password
-    ).decode("utf-8")
+        self.rehash_password(raw_password)
+        self.calendar_feed_secret = None  # retires the calendar feed URL
+
+    def rehash_password(self, raw_password):
+        """Same password, current cost; keeps the calendar feed URL."""
+        self.password_hash = hasher.hash(raw_password, self.role)
 
     def verify_password(self, raw_password):
-        return bcrypt.check_password_hash(
-        self.password_hash,
-        raw_password
-    )
+        return hasher.check(self.password_hash, raw_password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash, self.role)
 
     # -------- Reset token --------
     def get_reset_token(self, expires_sec=1800):
@@ -116,13 +150,17 @@ class User(db.Model, UserMixin):
 # -----------------------------
 # Department
 # -----------------------------
-class Department(db.Model):
+class Department(db.Model, TenantScoped):
     __tablename__ = "department"
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
 
+    __table_args__ = (
+        db.UniqueConstraint("tenant_id", "name", name="uq_department_tenant_name"),
+    )
+
     doctors = db.relationship("DoctorProfile", backref="department")
 
 
@@ -198,7 +236,7 @@ class PatientProfile(db.Model):
 # -----------------------------
 # Availability (Time-based)
 # -----------------------------
-class Availability(db.Model):
+class Availability(db.Model, TenantScoped):
     __tablename__ = "availability"
 
     id = db.Column(db.Integer, primary_key=True)
@@ -226,6 +264,12 @@ class Availability(db.Model):
         "end_time",
         name="uq_doctor_date_time"
     ),
+    db.Index(
+        "ix_availability_tenant_doctor_date",
+        "tenant_id",
+        "doctor_profile_id",
+        "available_date"
+    ),
     )
 
 
@@ -233,7 +277,7 @@ class Availability(db.Model):
 # -----------------------------
 # Appointment
 # -----------------------------
-class Appointment(db.Model):
+class Appointment(db.Model, TenantScoped):
     __tablename__ = "appointment"
 
     id = db.Column(db.Integer, primary_key=True)
@@ -249,9 +293,32 @@ class Appointment(db.Model):
     default="BOOKED"
     )
 
- 
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Bulk UPDATEs must set this too, calendar feeds version on it
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+
+    __table_args__ = (
+        db.Index("ix_appointment_tenant_datetime", "tenant_id", "appointment_datetime"),
+        db.Index(
+            "ix_appointment_tenant_doctor_datetime",
+            "tenant_id",
+            "doctor_id",
+            "appointment_datetime"
+        ),
+        db.Index(
+            "ix_appointment_tenant_patient_status",
+            "tenant_id",
+            "patient_id",
+            "status"
+        ),
+    )
+
     status_history = db.relationship(
         "AppointmentStatusHistory",
         backref="appointment",
@@ -294,7 +361,7 @@ class AppointmentStatusHistory(db.Model):
 # -----------------------------
 # Notification
 # -----------------------------
-class Notification(db.Model):
+class Notification(db.Model, TenantScoped):
     __tablename__ = "notification"
 
     id = db.Column(db.Integer, primary_key=True)
@@ -316,6 +383,10 @@ class Notification(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_notification_tenant_user_read", "tenant_id", "user_id", "is_read"),
+    )
+
 
 class DoctorAvailability(db.Model):
     __tablename__ = 'doctor_availability'
@@ -378,3 +449,66 @@ class Treatment(db.Model):
         'Appointment',
         backref=db.backref('treatment', uselist=False)
     )
+
+
+# -----------------------------
+# Appointment Reminder (reminders sent, see app/reminders.py)
+# -----------------------------
+class AppointmentReminder(db.Model):
+    __tablename__ = "appointment_reminder"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    appointment_id = db.Column(
+        db.Integer,
+        db.ForeignKey("appointment.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    kind = db.Column(db.String(20), nullable=False)
+
+    sent_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("appointment_id", "kind", name="uq_reminder_appointment_kind"),
+    )
+
+
+# -----------------------------
+# Idempotency Key (replayed form submissions, see app/idempotency.py)
+# -----------------------------
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_key"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    endpoint = db.Column(db.String(100), nullable=False)
+    key = db.Column(db.String(64), nullable=False)
+    # URL the key was claimed on, a reuse elsewhere is rejected
+    path = db.Column(db.String(500), nullable=False, server_default="")
+
+    # Outcome, NULL while the first request is still running
+    status_code = db.Column(db.Integer)
+    location = db.Column(db.String(500))
+    messages = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "endpoint", "key", name="uq_idempotency_user_endpoint_key"),
+    )
+
+
+# -----------------------------
+# Resource Version (conditional GET, see app/versioning.py)
+# -----------------------------
+class ResourceVersion(db.Model):
+    __tablename__ = "resource_version"
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,176 @@
+"""
+Password hashing for HealNest.
+
+bcrypt is slow on purpose, so hashing and verification never run on the
+request thread. Jobs go to a small process pool, and the number of jobs in
+flight is capped so a burst of logins fails fast instead of tying up every
+gunicorn thread.
+
+Cost (bcrypt log rounds) is configured per role:
+
+    BCRYPT_LOG_ROUNDS        default cost for every role
+    BCRYPT_ROUNDS_BY_ROLE    {"admin": 13, ...} overrides per role
+    PASSWORD_POOL_WORKERS    pool processes, 0 hashes inline
+    PASSWORD_POOL_MAX_QUEUE  max jobs queued or running at once
+    PASSWORD_POOL_QUEUE_WAIT seconds to wait for a queue slot (0 fails at once)
+    PASSWORD_POOL_TIMEOUT    seconds to wait for a result
+
+Pool processes are started with forkserver (spawn where that's missing),
+not forked from a threaded gunicorn worker. A pool whose process died is
+replaced and the job retried once.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt as _bcrypt
+from flask import current_app
+
+
+DEFAULT_ROUNDS = 12
+
+
+class PasswordPoolBusy(RuntimeError):
+    """Raised when the hashing queue is full or a job takes too long."""
+
+
+# -----------------------------
+# Worker functions (run in the pool)
+# -----------------------------
+def _hash_password(raw_password, rounds):
+    return _bcrypt.hashpw(
+        raw_password.encode("utf-8"),
+        _bcrypt.gensalt(rounds)
+    ).decode("utf-8")
+
+
+def _check_password(password_hash, raw_password):
+    try:
+        return _bcrypt.checkpw(
+            raw_password.encode("utf-8"),
+            password_hash.encode("utf-8")
+        )
+    except ValueError:
+        # Malformed / non-bcrypt hash
+        return False
+
+
+# -----------------------------
+# Cost helpers
+# -----------------------------
+def rounds_for_role(role):
+    config = current_app.config
+    default = config.get("BCRYPT_LOG_ROUNDS", DEFAULT_ROUNDS)
+    return config.get("BCRYPT_ROUNDS_BY_ROLE", {}).get(role, default)
+
+
+def hash_rounds(password_hash):
+    """Cost encoded in a bcrypt hash ($2b$12$...), or None."""
+    try:
+        return int(password_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash, role):
+    return hash_rounds(password_hash) != rounds_for_role(role)
+
+
+# -----------------------------
+# Bounded process pool
+# -----------------------------
+def _start_method():
+    methods = multiprocessing.get_all_start_methods()
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+class PasswordHasher:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._slots = None
+
+    def _pool(self):
+        config = current_app.config
+        workers = config.get("PASSWORD_POOL_WORKERS", 0)
+
+        if workers <= 0:
+            return None, None
+
+        with self._lock:
+            # Pools don't survive fork (gunicorn workers), build one per process
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context(_start_method())
+                )
+                self._slots = threading.BoundedSemaphore(
+                    config.get("PASSWORD_POOL_MAX_QUEUE", workers * 8)
+                )
+                self._pid = os.getpid()
+
+            return self._executor, self._slots
+
+    def _discard(self, broken):
+        """Drop a broken pool so the next job builds a fresh one."""
+        with self._lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _submit(self, executor, slots, func, args):
+        wait = current_app.config.get("PASSWORD_POOL_QUEUE_WAIT", 0)
+        if not slots.acquire(timeout=wait):
+            raise PasswordPoolBusy("Password hashing queue is full.")
+
+        try:
+            future = executor.submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+
+        # The slot stays taken until the job is done, even if the caller
+        # gave up waiting for it
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _run(self, func, *args):
+        timeout = current_app.config.get("PASSWORD_POOL_TIMEOUT", 10)
+
+        for attempt in range(2):
+            executor, slots = self._pool()
+
+            if executor is None:
+                return func(*args)
+
+            try:
+                return self._submit(executor, slots, func, args).result(timeout=timeout)
+            except FuturesTimeout:
+                raise PasswordPoolBusy("Password hashing timed out.") from None
+            except BrokenProcessPool:
+                self._discard(executor)
+                if attempt:
+                    raise
+
+    def hash(self, raw_password, role=None):
+        return self._run(_hash_password, raw_password, rounds_for_role(role))
+
+    def check(self, password_hash, raw_password):
+        if not password_hash:
+            return False
+        return self._run(_check_password, password_hash, raw_password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pid = None
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,123 @@
+"""
+Row projections for list pages.
+
+List pages only print a few columns per row, so instead of full User /
+DoctorProfile / Appointment entities (password hashes, bios, descriptions,
+identity-map bookkeeping and one lazy load per relationship) they select
+just those columns in a single joined query and get compact named tuples.
+
+The ``*_rows()`` functions return column queries that views can filter,
+sort and paginate like any other query; ``rows`` and ``paginate`` turn the
+results into the tuple types below, and ``columns`` into the columnar form
+JSON endpoints send.
+"""
+
+from collections import namedtuple
+
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models import Appointment, Department, DoctorProfile, PatientProfile, User
+
+
+DoctorRow = namedtuple("DoctorRow", "id email is_active full_name department_name")
+
+PatientRow = namedtuple("PatientRow", "id email is_active full_name contact_number")
+
+AppointmentRow = namedtuple(
+    "AppointmentRow",
+    "id appointment_datetime status "
+    "patient_id patient_name "
+    "doctor_id doctor_name doctor_email department_name",
+)
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def doctor_rows():
+    """Non-deleted doctors with a profile."""
+    return (
+        db.session.query(
+            User.id,
+            User.email,
+            User.is_active,
+            DoctorProfile.full_name,
+            Department.name,
+        )
+        .join(DoctorProfile, DoctorProfile.user_id == User.id)
+        .outerjoin(Department, Department.id == DoctorProfile.department_id)
+        .filter(User.role == "doctor", User.is_deleted == False)
+    )
+
+
+def patient_rows(include_deleted=False):
+    """Patients with a profile, non-deleted unless ``include_deleted``."""
+    query = (
+        db.session.query(
+            User.id,
+            User.email,
+            User.is_active,
+            PatientProfile.full_name,
+            PatientProfile.contact_number,
+        )
+        .join(PatientProfile, PatientProfile.user_id == User.id)
+        .filter(User.role == "patient")
+    )
+    if not include_deleted:
+        query = query.filter(User.is_deleted == False)
+    return query
+
+
+def appointment_rows():
+    """All appointments with patient, doctor and department names."""
+    doctor = aliased(User)
+
+    return (
+        db.session.query(
+            Appointment.id,
+            Appointment.appointment_datetime,
+            Appointment.status,
+            Appointment.patient_id,
+            PatientProfile.full_name,
+            Appointment.doctor_id,
+            DoctorProfile.full_name,
+            doctor.email,
+            Department.name,
+        )
+        .select_from(Appointment)
+        .outerjoin(PatientProfile, PatientProfile.user_id == Appointment.patient_id)
+        .outerjoin(doctor, doctor.id == Appointment.doctor_id)
+        .outerjoin(DoctorProfile, DoctorProfile.user_id == Appointment.doctor_id)
+        .outerjoin(Department, Department.id == DoctorProfile.department_id)
+    )
+
+
+# -----------------------------
+# Results
+# -----------------------------
+def rows(query, row_type):
+    return [row_type._make(row) for row in query]
+
+
+def paginate(query, row_type, page, per_page):
+    """``query.paginate`` with the page items as ``row_type`` tuples."""
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    pagination.items = [row_type._make(row) for row in pagination.items]
+    return pagination
+
+
+def columns(query, names, **convert):
+    """
+    ``{name: [values...]}`` with one list per column, which is much smaller
+    as JSON than a list of objects repeating every key. ``convert`` maps a
+    column name to a function applied to each of its values.
+    """
+    result = {name: [] for name in names}
+    lists = [(result[name], convert.get(name)) for name in names]
+
+    for row in query:
+        for (values, func), value in zip(lists, row):
+            values.append(func(value) if func and value is not None else value)
+
+    return result
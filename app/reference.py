@@ -0,0 +1,188 @@
+"""
+Process-wide cache of reference data.
+
+Departments and the active doctor directory are read on most pages but
+change rarely, and the tenant registry is read on every request. They are
+loaded once per process (per tenant for tenant data) as plain, immutable
+rows (safe to share between threads and requests, unlike ORM instances)
+and reused until:
+
+  * a commit in this process touches one of their tables
+    (``tables_changed`` in app/versioning.py), or
+  * the table version stamps differ when rechecked, at most every
+    REFERENCE_CACHE_RECHECK_SECONDS, which picks up writes made by
+    other workers.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db, models
+from app.tenancy import current_tenant_id
+from app.versioning import get_versions, tables_changed
+
+
+TenantRef = namedtuple("TenantRef", "id slug name hostname bind_key")
+
+DepartmentRef = namedtuple("DepartmentRef", "id name description")
+
+DoctorRef = namedtuple(
+    "DoctorRef", "user_id profile_id full_name email department_id department_name"
+)
+
+
+# -----------------------------
+# Loaders
+# -----------------------------
+def _load_tenants():
+    rows = db.session.execute(
+        select(
+            models.Tenant.id,
+            models.Tenant.slug,
+            models.Tenant.name,
+            models.Tenant.hostname,
+            models.Tenant.bind_key,
+        ).order_by(models.Tenant.id)
+    )
+    return tuple(TenantRef(*row) for row in rows)
+
+
+def _load_departments():
+    rows = db.session.execute(
+        select(
+            models.Department.id,
+            models.Department.name,
+            models.Department.description,
+        ).order_by(models.Department.name)
+    )
+    return tuple(DepartmentRef(*row) for row in rows)
+
+
+def _load_doctors():
+    rows = db.session.execute(
+        select(
+            models.User.id,
+            models.DoctorProfile.id,
+            models.DoctorProfile.full_name,
+            models.User.email,
+            models.Department.id,
+            models.Department.name,
+        )
+        .join(models.DoctorProfile, models.DoctorProfile.user_id == models.User.id)
+        .outerjoin(models.Department, models.DoctorProfile.department_id == models.Department.id)
+        .where(
+            models.User.role == "doctor",
+            models.User.is_deleted == False,
+            models.User.is_active == True,
+        )
+        .order_by(models.DoctorProfile.full_name)
+    )
+    return tuple(DoctorRef(*row) for row in rows)
+
+
+# name -> (loader, tables it depends on)
+DATASETS = {
+    "tenants": (_load_tenants, ("tenant",)),
+    "departments": (_load_departments, ("department",)),
+    "doctors": (_load_doctors, ("user", "doctor_profile", "department")),
+}
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+class ReferenceCache:
+
+    def __init__(self, recheck_seconds=30):
+        self.recheck_seconds = recheck_seconds
+        self._entries = {}   # (name, tenant id) -> (value, versions, checked_at)
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        loader, tables = DATASETS[name]
+        key = (name, current_tenant_id())
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            value, versions, checked_at = entry
+            if now - checked_at < self.recheck_seconds:
+                return value
+
+            if self._versions(tables) == versions:
+                self._entries[key] = (value, versions, now)
+                return value
+
+        with self._lock:
+            # Read the stamps first, so a concurrent write can only make
+            # the entry look older than it is, never newer.
+            versions = self._versions(tables)
+            value = loader()
+            self._entries[key] = (value, versions, now)
+
+        return value
+
+    def invalidate(self, tables):
+        stale = {
+            name for name, (_, depends_on) in DATASETS.items()
+            if set(depends_on) & set(tables)
+        }
+        for key in list(self._entries):
+            if key[0] in stale:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    @staticmethod
+    def _versions(tables):
+        versions = get_versions(tables)
+        return tuple(versions.get(t, (0, None))[0] for t in tables)
+
+
+@tables_changed.connect
+def _invalidate(app, changes, **extra):
+    cache = app.extensions.get("reference_cache")
+    if cache is not None:
+        cache.invalidate(changes)
+
+
+def init_reference_cache(app):
+    app.extensions["reference_cache"] = ReferenceCache(
+        app.config["REFERENCE_CACHE_RECHECK_SECONDS"]
+    )
+    app.jinja_env.globals["reference"] = {
+        "departments": departments,
+        "doctors": doctors,
+    }
+
+
+# -----------------------------
+# Accessors
+# -----------------------------
+def _cache():
+    return current_app.extensions["reference_cache"]
+
+
+def tenants():
+    """Every tenant, resolved by host name in app/tenancy.py."""
+    return _cache().get("tenants")
+
+
+def departments():
+    """All departments, ordered by name."""
+    return _cache().get("departments")
+
+
+def department_choices():
+    """(id, name) pairs for department select fields."""
+    return [(d.id, d.name) for d in departments()]
+
+
+def doctors():
+    """Active, non-deleted doctors with profiles, ordered by name."""
+    return _cache().get("doctors")
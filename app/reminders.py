@@ -0,0 +1,209 @@
+"""
+Appointment reminders.
+
+``send_reminders`` finds BOOKED appointments starting within the next
+REMINDER_LEAD_HOURS and gives each patient one APPOINTMENT_REMINDER
+notification. Each reminder sent is recorded in ``appointment_reminder``,
+unique per appointment and kind, so runs can overlap or repeat without
+sending anything twice.
+
+The scan walks the ``appointment_datetime`` index in keyset order, one
+chunk of REMINDER_BATCH_SIZE appointments at a time, and writes each chunk
+with two bulk INSERTs and one commit. Memory stays at one chunk however
+many appointments are due.
+
+Run it from cron with ``flask reminders send``, or set
+REMINDER_SCHEDULER_ENABLED to run it every REMINDER_INTERVAL_SECONDS in a
+background thread of each worker (gunicorn.conf.py). A lock file makes
+sure only one process per machine runs it at a time.
+"""
+
+import fcntl
+import os
+import threading
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, exists, insert, or_
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Appointment, AppointmentReminder, DoctorProfile, Notification, Tenant
+from app.tenancy import tenant_context
+
+
+KIND = "upcoming"
+
+
+# -----------------------------
+# Job
+# -----------------------------
+def _due(start, end, after, batch_size):
+    """Next chunk of due appointments without a reminder, after ``after``."""
+    query = (
+        db.session.query(
+            Appointment.id,
+            Appointment.tenant_id,
+            Appointment.patient_id,
+            Appointment.appointment_datetime,
+            DoctorProfile.full_name,
+        )
+        .outerjoin(DoctorProfile, DoctorProfile.user_id == Appointment.doctor_id)
+        .filter(
+            Appointment.status == "BOOKED",
+            Appointment.appointment_datetime >= start,
+            Appointment.appointment_datetime < end,
+            ~exists().where(
+                AppointmentReminder.appointment_id == Appointment.id,
+                AppointmentReminder.kind == KIND
+            )
+        )
+    )
+
+    if after is not None:
+        last_datetime, last_id = after
+        query = query.filter(or_(
+            Appointment.appointment_datetime > last_datetime,
+            and_(
+                Appointment.appointment_datetime == last_datetime,
+                Appointment.id > last_id
+            )
+        ))
+
+    return (
+        query
+        .order_by(Appointment.appointment_datetime, Appointment.id)
+        .limit(batch_size)
+        .all()
+    )
+
+
+def _message(when, doctor_name):
+    doctor = f"Dr. {doctor_name}" if doctor_name else "your doctor"
+    return (
+        f"Reminder: your appointment with {doctor} is on "
+        f"{when.strftime('%d %b %Y at %I:%M %p')}."
+    )
+
+
+def send_reminders(now=None, lead_hours=None, batch_size=None):
+    """Send due reminders in the current database, returns how many."""
+    config = current_app.config
+    now = now or datetime.now()
+    end = now + timedelta(hours=lead_hours or config["REMINDER_LEAD_HOURS"])
+    batch_size = batch_size or config["REMINDER_BATCH_SIZE"]
+
+    sent, after, retried = 0, None, False
+    while True:
+        chunk = _due(now, end, after, batch_size)
+        if not chunk:
+            return sent
+
+        sent_at = datetime.utcnow()
+        try:
+            db.session.execute(insert(AppointmentReminder), [
+                {"appointment_id": row.id, "kind": KIND, "sent_at": sent_at}
+                for row in chunk
+            ])
+            db.session.execute(insert(Notification), [
+                {
+                    "tenant_id": row.tenant_id,
+                    "user_id": row.patient_id,
+                    "type": "APPOINTMENT_REMINDER",
+                    "message": _message(row.appointment_datetime, row.full_name),
+                    "is_read": False,
+                    "created_at": sent_at,
+                }
+                for row in chunk
+            ])
+            db.session.commit()
+            sent += len(chunk)
+        except IntegrityError:
+            # Another run got some of these first; the next query skips
+            # them. Twice in a row means something else is wrong.
+            db.session.rollback()
+            if retried:
+                raise
+            retried = True
+            continue
+
+        after = (chunk[-1].appointment_datetime, chunk[-1].id)
+        retried = False
+
+
+def send_all_reminders(**kwargs):
+    """Reminders for the primary database and every tenant with its own."""
+    sent = send_reminders(**kwargs)
+
+    bound = Tenant.query.filter(Tenant.bind_key.isnot(None)).all()
+    for tenant in bound:
+        with tenant_context(tenant):
+            sent += send_reminders(**kwargs)
+        db.session.remove()
+
+    return sent
+
+
+# -----------------------------
+# Background scheduler
+# -----------------------------
+def _lock_path(app):
+    return os.path.join(app.instance_path, "reminders.lock")
+
+
+def _run_once(app):
+    os.makedirs(app.instance_path, exist_ok=True)
+
+    with open(_lock_path(app), "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return  # another process on this machine is on it
+
+        with app.app_context():
+            try:
+                sent = send_all_reminders()
+                if sent:
+                    app.logger.info("Sent %d appointment reminders.", sent)
+            except Exception:
+                app.logger.exception("Reminder job failed.")
+            finally:
+                db.session.remove()
+
+
+def start_scheduler(app):
+    """Run the reminder job every REMINDER_INTERVAL_SECONDS in a daemon thread."""
+    if not app.config["REMINDER_SCHEDULER_ENABLED"]:
+        return None
+
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(app.config["REMINDER_INTERVAL_SECONDS"]):
+            _run_once(app)
+
+    thread = threading.Thread(target=loop, name="reminders", daemon=True)
+    thread.stop = stop
+    thread.start()
+    return thread
+
+
+def init_reminders(app):
+    app.cli.add_command(reminders_cli)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+reminders_cli = AppGroup("reminders", help="Appointment reminders.")
+
+
+@reminders_cli.command("send")
+@click.option("--lead-hours", type=int, help="Look this far ahead (default REMINDER_LEAD_HOURS).")
+@click.option("--batch-size", type=int, help="Appointments per chunk (default REMINDER_BATCH_SIZE).")
+def send_command(lead_hours, batch_size):
+    """Send reminders for upcoming appointments (safe to re-run)."""
+    sent = send_all_reminders(lead_hours=lead_hours, batch_size=batch_size)
+    click.echo(f"Sent {sent} reminders.")
@@ -1,12 +1,17 @@
 from flask import render_template, flash, redirect, url_for, request, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import func
+from sqlalchemy import func, select, update
 from datetime import datetime, date, timedelta
 from functools import wraps
-from app import db, models
+from app import appointments, db, models
 from . import admin_bp
 from sqlalchemy.orm import aliased
 from app.models import User, DoctorProfile
+from app.routes.decorators import read_only, conditional
+from app import fragment_cache, reference
+from app.streaming import stream_page, patient_history
+from app import projections
+from app.projections import DoctorRow, PatientRow, AppointmentRow
 
 
 from app.forms import (
@@ -36,6 +41,7 @@ def admin_required(func):
 
 @admin_bp.route('/dashboard')
 @login_required
+@read_only
 def dashboard():
     if current_user.role != 'admin':
         flash('Unauthorized access.', 'danger')
@@ -67,22 +73,20 @@ def dashboard():
 
       # ================= RECENT DOCTORS =================
 
-    doctors = (
-        models.User.query
-        .filter_by(role='doctor', is_deleted=False)
+    doctors = projections.rows(
+        projections.doctor_rows()
         .order_by(models.User.created_at.desc())
-        .limit(7)
-        .all()
+        .limit(7),
+        DoctorRow
     )
 
     # ================= RECENT PATIENTS =================
 
-    patients = (
-        models.User.query
-        .filter_by(role='patient', is_deleted=False)
+    patients = projections.rows(
+        projections.patient_rows()
         .order_by(models.User.created_at.desc())
-        .limit(7)
-        .all()
+        .limit(7),
+        PatientRow
     )
 
 
@@ -90,15 +94,15 @@ def dashboard():
 
     
 
-    upcoming_appointments = (
-        models.Appointment.query
+    upcoming_appointments = projections.rows(
+        projections.appointment_rows()
           .filter(
                 models.Appointment.appointment_datetime >= now,
                 models.Appointment.status == "BOOKED"
         )
         .order_by(models.Appointment.created_at.asc())
-        .limit(7)
-        .all()
+        .limit(7),
+        AppointmentRow
     )
 
     return render_template(
@@ -114,6 +118,8 @@ def dashboard():
 
 @admin_bp.route('/dashboard/analytics')
 @login_required
+@read_only
+@conditional("appointment", "user", navbar=False, key=lambda: datetime.utcnow().date())
 def dashboard_analytics():
     if current_user.role != 'admin':
         return jsonify({"error": "Unauthorized"}), 403
@@ -180,6 +186,15 @@ def dashboard_analytics():
         "user_distribution": user_distribution
     })
 
+
+@admin_bp.route('/cache/stats')
+@login_required
+def cache_stats():
+    if current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return jsonify({"fragments": fragment_cache.stats()})
+
 # -------------------------------------------------
 # Doctor Management
 # -------------------------------------------------
@@ -193,10 +208,7 @@ def add_doctor():
     form = AddDoctorForm()
 
     # Populate department dropdown
-    form.department_id.choices = [
-        (d.id, d.name)
-        for d in models.Department.query.order_by(models.Department.name).all()
-    ]
+    form.department_id.choices = reference.department_choices()
 
     if form.validate_on_submit():
 
@@ -247,6 +259,7 @@ def add_doctor():
 
 @admin_bp.route('/doctors')
 @login_required
+@read_only
 def manage_doctors():
     if current_user.role != 'admin':
         flash('Unauthorized access.', 'danger')
@@ -256,11 +269,7 @@ def manage_doctors():
     sort = request.args.get('sort', 'created_at')
     order = request.args.get('order', 'desc')
 
-    query = (
-        models.User.query
-        .filter_by(role='doctor', is_deleted=False)   #  hide deleted doctors
-        .join(models.DoctorProfile)
-    )
+    query = projections.doctor_rows()   #  hides deleted doctors
 
     # ===== SORTING =====
     if sort == 'name':
@@ -277,11 +286,7 @@ def manage_doctors():
     else:
         query = query.order_by(column.desc())
 
-    doctors = query.paginate(
-        page=page,
-        per_page=10,
-        error_out=False
-    )
+    doctors = projections.paginate(query, DoctorRow, page=page, per_page=10)
 
     return render_template(
         'admin/manage_doctors.html',
@@ -320,10 +325,7 @@ def edit_doctor(user_id):
     form = EditDoctorForm(obj=profile)
 
     # 6️ Populate department dropdown
-    form.department_id.choices = [
-        (d.id, d.name)
-        for d in models.Department.query.order_by(models.Department.name).all()
-    ]
+    form.department_id.choices = reference.department_choices()
 
     if form.validate_on_submit():
 
@@ -409,6 +411,7 @@ def edit_patient(user_id):
 
 @admin_bp.route('/patients')
 @login_required
+@read_only
 def manage_patients():
     if current_user.role != 'admin':
         flash('Unauthorized access.', 'danger')
@@ -418,11 +421,7 @@ def manage_patients():
     sort = request.args.get('sort', 'created_at')
     order = request.args.get('order', 'desc')
 
-    query = (
-        models.User.query
-        .filter_by(role='patient', is_deleted=False)   #  hide deleted patients
-        .join(models.PatientProfile)
-    )
+    query = projections.patient_rows()   #  hides deleted patients
 
     # ===== SORTING =====
     if sort == 'name':
@@ -439,11 +438,7 @@ def manage_patients():
     else:
         query = query.order_by(column.desc())
 
-    patients = query.paginate(
-        page=page,
-        per_page=10,
-        error_out=False
-    )
+    patients = projections.paginate(query, PatientRow, page=page, per_page=10)
 
     return render_template(
         'admin/manage_patients.html',
@@ -568,12 +563,110 @@ def activate_user(user_id):
     return redirect(request.referrer or url_for('admin.dashboard'))
 
 
+# -------------------------------------------------
+# Bulk Actions
+# -------------------------------------------------
+BULK_ACTIONS = {
+    # action: (rows it applies to, new values, flash message, category)
+    "blacklist": (
+        (models.User.is_active == True,),
+        {"is_active": False},
+        "{count} {role}(s) blacklisted.",
+        "warning"
+    ),
+    "activate": (
+        (models.User.is_active == False,),
+        {"is_active": True},
+        "{count} {role}(s) re-activated.",
+        "success"
+    ),
+    "delete": (
+        (),
+        {"is_deleted": True, "is_active": False},
+        "{count} {role}(s) deleted.",
+        "warning"
+    ),
+}
+
+
+def _cancel_future_bookings(doctor_ids):
+    """Cancel the deleted doctors' upcoming bookings and tell the patients."""
+    booked = (
+        select(models.Appointment.id)
+        .where(
+            models.Appointment.doctor_id.in_(doctor_ids),
+            models.Appointment.appointment_datetime >= datetime.now()
+        )
+        .scalar_subquery()
+    )
+
+    return appointments.bulk_transition(
+        booked,
+        "CANCELLED",
+        notify=lambda changed: (
+            changed.patient_id,
+            "APPOINTMENT_CANCELLED",
+            f"Your appointment scheduled for "
+            f"{changed.appointment_datetime.strftime('%d %b %Y %I:%M %p')} "
+            f"has been cancelled because the doctor is no longer available."
+        )
+    )
+
+
+@admin_bp.route('/users/bulk/<role>', methods=['POST'])
+@login_required
+def bulk_users(role):
+    if current_user.role != 'admin':
+        flash('Unauthorized action.', 'danger')
+        return redirect(url_for('main.home'))
+
+    back = url_for('admin.manage_doctors' if role == 'doctor' else 'admin.manage_patients')
+
+    if role not in ('doctor', 'patient') or request.form.get('action') not in BULK_ACTIONS:
+        flash('Invalid bulk action.', 'danger')
+        return redirect(request.referrer or url_for('admin.dashboard'))
+
+    user_ids = request.form.getlist('user_ids', type=int)
+    if not user_ids:
+        flash('Select at least one user.', 'warning')
+        return redirect(request.referrer or back)
+
+    criteria, values, message, category = BULK_ACTIONS[request.form['action']]
+
+    # One UPDATE for the whole selection
+    changed_ids = db.session.execute(
+        update(models.User)
+        .where(
+            models.User.id.in_(user_ids),
+            models.User.role == role,
+            models.User.is_deleted == False,
+            *criteria
+        )
+        .values(**values)
+        .returning(models.User.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    cancelled = []
+    if changed_ids and role == 'doctor' and values.get('is_deleted'):
+        cancelled = _cancel_future_bookings(changed_ids)
+
+    db.session.commit()
+
+    flash(message.format(count=len(changed_ids), role=role), category)
+    if cancelled:
+        flash(f'{len(cancelled)} upcoming appointment(s) cancelled and patients notified.', 'info')
+    return redirect(request.referrer or back)
+
+
 # -------------------------------------------------
 # Department Management
 # -------------------------------------------------
 
 @admin_bp.route('/departments', methods=['GET', 'POST'])
 @login_required
+@read_only
+@conditional("department", "doctor_profile", max_age=1800)
 def manage_departments():
     if current_user.role != 'admin':
         flash('Unauthorized access.', 'danger')
@@ -620,6 +713,7 @@ def manage_departments():
 
 @admin_bp.route('/departments/<int:dept_id>')
 @login_required
+@read_only
 def department_details(dept_id):
     if current_user.role != 'admin':
         flash('Unauthorized access.', 'danger')
@@ -712,6 +806,7 @@ def delete_department(dept_id):
 @admin_bp.route("/appointments")
 @login_required
 @admin_required
+@read_only
 def manage_appointments():
 
     page = request.args.get('page', 1, type=int)
@@ -722,7 +817,7 @@ def manage_appointments():
     status = request.args.get("status")
     date_str = request.args.get("date")
 
-    query = models.Appointment.query
+    query = projections.appointment_rows()
 
     # =========================
     # FILTER: Doctor
@@ -773,28 +868,12 @@ def manage_appointments():
     # =========================
     # PAGINATION
     # =========================
-    appointments = query.paginate(
-        page=page,
-        per_page=10,
-        error_out=False
-    )
-
-    doctors = (
-        models.User.query
-        .filter_by(
-            role="doctor",
-            is_deleted=False,
-            is_active=True
-        )
-        .join(models.DoctorProfile)
-        .order_by(models.DoctorProfile.full_name)
-        .all()
-    )
+    appointments = projections.paginate(query, AppointmentRow, page=page, per_page=10)
 
     return render_template(
         "admin/manage_appointments.html",
         appointments=appointments,
-        doctors=doctors,
+        doctors=reference.doctors(),
         sort=sort,
         order=order
     )
@@ -802,6 +881,7 @@ def manage_appointments():
 
 @admin_bp.route("/patient/<int:patient_id>/history")
 @login_required
+@read_only
 def view_patient_history(patient_id):
 
     if current_user.role != "admin":
@@ -810,15 +890,7 @@ def view_patient_history(patient_id):
 
     patient = models.User.query.get_or_404(patient_id)
 
-    history = (
-        models.Appointment.query
-        .filter(
-            models.Appointment.patient_id == patient_id,
-            models.Appointment.status == "COMPLETED"
-        )
-        .order_by(models.Appointment.appointment_datetime.desc())
-        .all()
-    )
+    history = patient_history(patient_id)
 
     # Calculate age
     profile = patient.patient_profile
@@ -831,7 +903,7 @@ def view_patient_history(patient_id):
             (profile.date_of_birth.month, profile.date_of_birth.day)
         )
 
-    return render_template(
+    return stream_page(
         "shared/patient_history.html",
         patient=patient,
         history=history,
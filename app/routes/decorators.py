@@ -1,7 +1,14 @@
+import json
 from functools import wraps
-from flask import redirect, url_for, flash
+from datetime import timezone
+from flask import abort, redirect, url_for, flash, request, g, current_app, session, make_response
 from flask_login import current_user
 
+from app import idempotency
+from app.compression import matching_etag, not_modified
+from app.database import wrote_recently
+from app.versioning import resource_etag
+
 
 def admin_required(func):
     @wraps(func)
@@ -29,3 +36,119 @@ def doctor_required(func):
 
         return func(*args, **kwargs)
     return wrapper
+
+
+def read_only(func):
+    """
+    Let a GET view read from the replica (see app/database.py).
+
+    Put it directly above the view function, so the user loader in
+    login_required still reads from the primary.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if request.method in ("GET", "HEAD") and not wrote_recently(
+            current_app.config["REPLICA_READ_YOUR_WRITES_SECONDS"]
+        ):
+            g.use_read_replica = True
+
+        return func(*args, **kwargs)
+    return wrapper
+
+
+# Tables the navbar in layout.html renders from
+NAVBAR_TABLES = ("notification", "user", "doctor_profile", "patient_profile")
+
+
+def conditional(*tables, navbar=True, key=None, max_age=None):
+    """
+    Conditional GET for views that only depend on ``tables``.
+
+    Answers a matching If-None-Match with 304 before the view runs, and adds
+    a strong ETag / Last-Modified to fresh responses (see app/versioning.py).
+    ``key`` returns anything else the response depends on, ``max_age`` rolls
+    the ETag for pages carrying a CSRF token.
+    """
+    depends_on = tables + (NAVBAR_TABLES if navbar else ())
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            # Pending flash messages are part of the page
+            if request.method not in ("GET", "HEAD") or session.get("_flashes"):
+                return func(*args, **kwargs)
+
+            etag, last_modified = resource_etag(
+                depends_on, key() if key else None, max_age
+            )
+
+            # The client may hold the compressed variant ("<etag>-gzip")
+            matched = matching_etag(request.if_none_match, etag)
+
+            if matched:
+                response = not_modified()
+                etag = matched
+            else:
+                response = make_response(func(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+def idempotent(func):
+    """
+    Replay the stored outcome of a POST whose idempotency key was seen
+    before, instead of running the view again (see app/idempotency.py).
+
+    Put it below login_required. Only redirects are stored; any other
+    response (a form re-rendered with errors) releases the key. A key
+    reused on another URL gets 422.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = idempotency.request_key() if request.method == "POST" else None
+        if key is None or not current_user.is_authenticated:
+            return func(*args, **kwargs)
+
+        claim = (current_user.id, request.endpoint, key)
+        outcome = idempotency.claim(*claim, request.path)
+
+        if outcome is not None:
+            if idempotency.reused(outcome, request.path):
+                abort(422)
+
+            if outcome.status_code is None:
+                flash("Your request is still being processed.", "warning")
+                return redirect(request.referrer or url_for("main.home"))
+
+            for category, message in json.loads(outcome.messages or "[]"):
+                flash(message, category)
+            return redirect(outcome.location, code=outcome.status_code)
+
+        flashed = len(session.get("_flashes", []))
+        try:
+            response = make_response(func(*args, **kwargs))
+        except Exception:
+            idempotency.release(*claim)
+            raise
+
+        if response.status_code in (301, 302, 303, 307, 308):
+            idempotency.complete(
+                *claim,
+                status_code=response.status_code,
+                location=response.headers["Location"],
+                messages=session.get("_flashes", [])[flashed:],
+            )
+        else:
+            idempotency.release(*claim)
+
+        return response
+    return wrapper
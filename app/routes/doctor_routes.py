@@ -6,16 +6,22 @@ from flask import (
     redirect,
     url_for,
     request,
-    abort
+    abort,
+    current_app,
+    jsonify
 )
-from app.models import Appointment, Treatment
+from app.models import Appointment, Treatment, PatientProfile
 
 from flask_login import login_required, current_user
 
-from app import db, models
+from app import appointments, db, ical, models
+from app.compression import matching_etag, not_modified
 from app.models import Availability, DoctorProfile, Appointment, User
-from app.forms import TreatmentForm, DoctorUpdateProfileForm, ChangePasswordForm
-from app.routes.decorators import doctor_required
+from app.forms import TreatmentForm, DoctorUpdateProfileForm, ChangePasswordForm, LeaveForm
+from app.routes.decorators import doctor_required, read_only, idempotent, conditional
+from app.streaming import stream_page, patient_history
+from app import projections
+from app.projections import AppointmentRow, PatientRow
 from collections import defaultdict
 
 from . import doctor_bp
@@ -32,6 +38,7 @@ SLOT_DURATION = timedelta(minutes=30)
 # -------------------------------------------------
 @doctor_bp.route('/dashboard')
 @login_required
+@read_only
 def dashboard():
 
     if current_user.role != 'doctor':
@@ -43,23 +50,23 @@ def dashboard():
 
     page = request.args.get('page', 1, type=int)
 
-    appointments_pagination = (
-        Appointment.query
+    appointments_pagination = projections.paginate(
+        projections.appointment_rows()
         .filter(
             Appointment.doctor_id == current_user.id,
             Appointment.status == "BOOKED",
             Appointment.appointment_datetime >= now
         )
-        .order_by(Appointment.appointment_datetime.asc())
-        .paginate(page=page, per_page=8, error_out=False)
+        .order_by(Appointment.appointment_datetime.asc()),
+        AppointmentRow, page=page, per_page=8
     )
 
-    assigned_patients = (
-        db.session.query(User)
+    assigned_patients = projections.rows(
+        projections.patient_rows(include_deleted=True)
         .join(Appointment, User.id == Appointment.patient_id)
         .filter(Appointment.doctor_id == current_user.id)
-        .distinct()
-        .all()
+        .distinct(),
+        PatientRow
     )
 
     return render_template(
@@ -72,11 +79,84 @@ def dashboard():
 
 
 
+# -------------------------------------------------
+# Week Schedule API
+# -------------------------------------------------
+@doctor_bp.route('/schedule/week')
+@login_required
+@read_only
+@conditional("availability", "appointment", "patient_profile", navbar=False, key=date.today)
+def week_schedule():
+    """
+    One week of availability blocks and appointments, as columns:
+
+        {"week_start": "2026-10-19", "slot_minutes": 30,
+         "availability": {"date": [...], "start": [...], "end": [...]},
+         "appointments": {"id": [...], "start": [...], "status": [...],
+                          "patient_id": [...], "patient_name": [...]}}
+
+    ``?start=YYYY-MM-DD`` picks the week (default: this week, from Monday).
+    """
+    if current_user.role != 'doctor':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    profile = current_user.doctor_profile or abort(404)
+
+    try:
+        start = date.fromisoformat(request.args["start"]) if "start" in request.args else date.today()
+    except ValueError:
+        abort(400)
+
+    week_start = start - timedelta(days=start.weekday())
+    week_end = week_start + timedelta(days=7)
+
+    availability = projections.columns(
+        db.session.query(Availability.available_date, Availability.start_time, Availability.end_time)
+        .filter(
+            Availability.doctor_profile_id == profile.id,
+            Availability.available_date >= week_start,
+            Availability.available_date < week_end
+        )
+        .order_by(Availability.available_date, Availability.start_time),
+        ("date", "start", "end"),
+        date=date.isoformat,
+        start=lambda t: t.strftime("%H:%M"),
+        end=lambda t: t.strftime("%H:%M")
+    )
+
+    booked = projections.columns(
+        db.session.query(
+            Appointment.id,
+            Appointment.appointment_datetime,
+            Appointment.status,
+            Appointment.patient_id,
+            PatientProfile.full_name
+        )
+        .outerjoin(PatientProfile, PatientProfile.user_id == Appointment.patient_id)
+        .filter(
+            Appointment.doctor_id == current_user.id,
+            Appointment.appointment_datetime >= datetime.combine(week_start, time.min),
+            Appointment.appointment_datetime < datetime.combine(week_end, time.min)
+        )
+        .order_by(Appointment.appointment_datetime),
+        ("id", "start", "status", "patient_id", "patient_name"),
+        start=lambda dt: dt.isoformat(timespec="minutes")
+    )
+
+    return jsonify({
+        "week_start": week_start.isoformat(),
+        "slot_minutes": int(SLOT_DURATION.total_seconds() // 60),
+        "availability": availability,
+        "appointments": booked
+    })
+
+
 # -------------------------------------------------
 # Treat Patient
 # -------------------------------------------------
 @doctor_bp.route('/treat/<int:appointment_id>', methods=['GET', 'POST'])
 @login_required
+@idempotent
 def treat_patient(appointment_id):
     if current_user.role != 'doctor':
         flash('Unauthorized access.', 'danger')
@@ -115,24 +195,21 @@ def treat_patient(appointment_id):
             )
         )
 
-        old_status = appointment.status
-        appointment.status = 'COMPLETED'
-
-        db.session.add(
-            models.AppointmentStatusHistory(
-                appointment_id=appointment.id,
-                old_status=old_status,
-                new_status='COMPLETED'
+        doctor_name = current_user.doctor_profile.full_name
+        completed = appointments.transition(
+            appointment,
+            'COMPLETED',
+            notify=lambda changed: (
+                changed.patient_id,
+                'APPOINTMENT_COMPLETED',
+                f"Dr. {doctor_name} has completed your appointment."
             )
         )
 
-        db.session.add(
-            models.Notification(
-                user_id=appointment.patient_id,
-                type='APPOINTMENT_COMPLETED',
-                message=f"Dr. {current_user.doctor_profile.full_name} has completed your appointment."
-            )
-        )
+        if not completed:
+            db.session.rollback()
+            flash('This appointment is not active.', 'warning')
+            return redirect(url_for('doctor.dashboard'))
 
         db.session.commit()
         flash('Treatment recorded and appointment completed.', 'success')
@@ -171,18 +248,81 @@ def profile():
         flash('Profile updated successfully.', 'success')
         return redirect(url_for('doctor.profile'))
 
+    token = ical.feed_token(current_user)
     return render_template(
         'doctor/profile.html',
         title='My Profile',
-        form=form
+        form=form,
+        calendar_feed_url=url_for(
+            'doctor.calendar_feed', token=token, _external=True
+        ) if token else None
     )
 
 
+@doctor_bp.route('/calendar/reset', methods=['POST'])
+@login_required
+@idempotent
+def reset_calendar_feed():
+    if current_user.role != 'doctor':
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('main.home'))
+
+    ical.reset_feed_secret(current_user)
+    db.session.commit()
+
+    flash('Your calendar feed link is ready. Any earlier link no longer works.', 'success')
+    return redirect(url_for('doctor.profile'))
+
+
+# -------------------------------------------------
+# Calendar Feed (.ics, see app/ical.py)
+# -------------------------------------------------
+@doctor_bp.route('/calendar/<token>.ics')
+@read_only
+def calendar_feed(token):
+    doctor = ical.load_token(token, lambda user_id: db.session.get(User, user_id))
+
+    if (
+        doctor is None
+        or doctor.role != 'doctor'
+        or not doctor.is_active
+        or doctor.is_deleted
+    ):
+        abort(404)
+
+    etag = ical.feed_etag(doctor.id)
+
+    # The client may hold the compressed variant ("<etag>-gzip")
+    matched = matching_etag(request.if_none_match, etag)
+
+    if matched:
+        response = not_modified()
+        etag = matched
+    else:
+        cache = current_app.extensions.get('fragment_cache')
+        key = f'ics:{etag}'
+        body = cache.get(key) if cache else None
+
+        if body is None:
+            body = ical.render_feed(doctor)
+            if cache:
+                cache.set(key, body, current_app.config['FRAGMENT_CACHE_DEFAULT_TTL'])
+
+        response = current_app.response_class(body, mimetype='text/calendar')
+        response.headers['Content-Disposition'] = 'inline; filename="healnest.ics"'
+
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config['CALENDAR_FEED_MAX_AGE']
+    return response
+
+
 # -------------------------------------------------
 # Cancel Appointment
 # -------------------------------------------------
 @doctor_bp.route('/cancel_appointment/<int:appointment_id>', methods=['POST'])
 @login_required
+@idempotent
 def cancel_appointment(appointment_id):
     if current_user.role != 'doctor':
         flash('Unauthorized access.', 'danger')
@@ -198,28 +338,22 @@ def cancel_appointment(appointment_id):
         flash('This appointment cannot be cancelled.', 'warning')
         return redirect(url_for('doctor.dashboard'))
 
-    old_status = appointment.status
-    appointment.status = 'CANCELLED'
-
-    db.session.add(
-        models.AppointmentStatusHistory(
-            appointment_id=appointment.id,
-            old_status=old_status,
-            new_status='CANCELLED'
+    doctor_name = current_user.doctor_profile.full_name
+    cancelled = appointments.transition(
+        appointment,
+        'CANCELLED',
+        notify=lambda changed: (
+            changed.patient_id,
+            'APPOINTMENT_CANCELLED',
+            f"Dr. {doctor_name} has cancelled your appointment scheduled for "
+            f"{changed.appointment_datetime.strftime('%d %b %Y %I:%M %p')}."
         )
     )
 
-    db.session.add(
-        models.Notification(
-            user_id=appointment.patient_id,
-            type='APPOINTMENT_CANCELLED',
-            message=(
-                f"Dr. {current_user.doctor_profile.full_name} has cancelled "
-                f"your appointment scheduled for "
-                f"{appointment.appointment_datetime.strftime('%d %b %Y %I:%M %p')}."
-            )
-        )
-    )
+    if not cancelled:
+        db.session.rollback()
+        flash('This appointment cannot be cancelled.', 'warning')
+        return redirect(url_for('doctor.dashboard'))
 
     db.session.commit()
     flash('Appointment cancelled and patient notified.', 'info')
@@ -302,6 +436,46 @@ def manage_availability():
 
 
 
+# -------------------------------------------------
+# Leave
+# -------------------------------------------------
+@doctor_bp.route("/leave", methods=["GET", "POST"])
+@login_required
+@doctor_required
+@idempotent
+def leave():
+    doctor = current_user.doctor_profile
+
+    if not doctor:
+        flash("Doctor profile not found.", "danger")
+        return redirect(url_for("doctor.dashboard"))
+
+    form = LeaveForm()
+
+    if form.validate_on_submit():
+        result = appointments.start_leave(
+            doctor,
+            form.start_date.data,
+            form.end_date.data,
+            reason=form.reason.data
+        )
+
+        flash(
+            f"Leave saved. {len(result.cancelled)} appointment(s) cancelled "
+            f"and patients notified.",
+            "info"
+        )
+        return redirect(url_for("doctor.dashboard"))
+
+    return render_template(
+        "doctor/leave.html",
+        title="Leave",
+        form=form,
+        today=date.today()
+    )
+
+
+
 @doctor_bp.route("/change-password", methods=["GET", "POST"])
 @login_required
 def change_password():
@@ -397,6 +571,7 @@ def get_available_slots(doctor_profile, selected_date):
 
 @doctor_bp.route("/patient/<int:patient_id>/history")
 @login_required
+@read_only
 def view_patient_history(patient_id):
 
     if current_user.role != "doctor":
@@ -405,17 +580,9 @@ def view_patient_history(patient_id):
 
     patient = models.User.query.get_or_404(patient_id)
 
-    history = (
-        models.Appointment.query
-        .filter(
-            models.Appointment.patient_id == patient_id,
-            models.Appointment.status == "COMPLETED"
-        )
-        .order_by(models.Appointment.appointment_datetime.desc())
-        .all()
-    )
+    history = patient_history(patient_id)
 
-    return render_template(
+    return stream_page(
         "shared/patient_history.html",
         patient=patient,
         history=history,
@@ -5,9 +5,10 @@ from flask_login import (
     logout_user,
     login_required
 )
-from sqlalchemy import or_
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import contains_eager
 
-from app import db, bcrypt, models
+from app import db, models
 from app.forms import (
     RegistrationForm,
     LoginForm,
@@ -16,6 +17,8 @@ from app.forms import (
 )
 
 from . import main_bp
+from app.routes.decorators import read_only
+from app.streaming import stream_page, YIELD_PER
 from app.routes.main_routes import *
 
 
@@ -83,7 +86,7 @@ def login():
     if form.validate_on_submit():
         user = models.User.query.filter_by(email=form.email.data).first()
 
-        if user and bcrypt.check_password_hash(user.password_hash, form.password.data):
+        if user and user.verify_password(form.password.data):
 
              #  BLOCK deleted users FIRST
             if user.is_deleted:
@@ -100,6 +103,11 @@ def login():
                 return redirect(url_for("main.login"))
 
 
+            # Re-hash with the current cost if the config changed
+            if user.password_needs_rehash():
+                user.rehash_password(form.password.data)
+                db.session.commit()
+
             login_user(user, remember=form.remember.data)
 
             #  FORCE password change ONLY for doctors
@@ -136,6 +144,7 @@ def logout():
 
 @main_bp.route("/search")
 @login_required
+@read_only
 def search():
     query = request.args.get("query", "", type=str).strip()
 
@@ -156,7 +165,6 @@ def search():
                     models.User.email.ilike(f"%{query}%")
                 )
             )
-            .all()
         )
 
         # ================= DOCTOR SEARCH =================
@@ -172,14 +180,19 @@ def search():
                     models.Department.name.ilike(f"%{query}%")
                 )
             )
-            .all()
         )
 
-        return render_template(
+        # Counts up front, rows are streamed into the page in batches
+        return stream_page(
             "admin/search_results.html",
             query=query,
-            patients=patients,
-            doctors=doctors,
+            patient_count=patients.count(),
+            doctor_count=doctors.count(),
+            patients=patients.options(contains_eager(models.PatientProfile.user)).yield_per(YIELD_PER),
+            doctors=doctors.options(
+                contains_eager(models.DoctorProfile.user),
+                contains_eager(models.DoctorProfile.department),
+            ).yield_per(YIELD_PER),
         )
 
     flash("Search is not available for your role.", "info")
@@ -192,22 +205,41 @@ def search():
 @main_bp.route("/notifications")
 @login_required
 def notifications():
+    Notification = models.Notification
+
+    # Remember what was unread for highlighting, then mark it all read in
+    # one statement before the page starts streaming
+    unread_ids = set(db.session.scalars(
+        select(Notification.id).where(
+            Notification.user_id == current_user.id,
+            Notification.is_read == False
+        )
+    ))
+
+    if unread_ids:
+        db.session.execute(
+            update(Notification)
+            .where(
+                Notification.user_id == current_user.id,
+                Notification.is_read == False,
+                Notification.id <= max(unread_ids)
+            )
+            .values(is_read=True)
+        )
+        db.session.commit()
+
     all_notifications = (
-        models.Notification.query
+        Notification.query
         .filter_by(user_id=current_user.id)
-        .order_by(models.Notification.created_at.desc())
-        .all()
+        .order_by(Notification.created_at.desc())
+        .yield_per(YIELD_PER)
     )
 
-    for notification in current_user.notifications:
-        notification.is_read = True
-
-    db.session.commit()
-
-    return render_template(
+    return stream_page(
         "notifications.html",
         title="My Notifications",
         notifications=all_notifications,
+        unread_ids=unread_ids,
     )
 
 
@@ -260,7 +292,7 @@ def reset_token(token):
     form = ResetPasswordForm()
 
     if form.validate_on_submit():
-        user.password = form.password.data
+        user.set_password(form.password.data)
         db.session.commit()
 
         flash(
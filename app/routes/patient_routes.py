@@ -2,11 +2,26 @@ from flask import jsonify, render_template, flash, redirect, url_for, request, a
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 
-from app import db, models
-from app.models import DoctorProfile
+from app import appointments, booking, db, models, reference
 from app.forms import BookingForm, UpdateProfileForm
 from . import patient_bp
 from app.routes.doctor_routes import get_available_slots
+from app.routes.decorators import read_only, conditional, idempotent
+from app.streaming import stream_page, patient_history
+from app import projections
+from app.locks import SlotBusy, slot_lock
+from app.projections import AppointmentRow
+
+
+def doctor_profile_or_404(doctor_profile_id):
+    """The doctor's profile, 404 unless the doctor belongs to this tenant."""
+    # Profiles aren't tenant scoped themselves, their user is
+    return (
+        models.DoctorProfile.query
+        .join(models.User, models.User.id == models.DoctorProfile.user_id)
+        .filter(models.DoctorProfile.id == doctor_profile_id)
+        .first_or_404()
+    )
 
 
 # -------------------------------------------------
@@ -14,6 +29,7 @@ from app.routes.doctor_routes import get_available_slots
 # -------------------------------------------------
 @patient_bp.route("/dashboard")
 @login_required
+@read_only
 def dashboard():
 
     if current_user.role != "patient":
@@ -25,35 +41,33 @@ def dashboard():
     # =========================
     # FETCH DEPARTMENTS
     # =========================
-    departments = models.Department.query.order_by(
-        models.Department.name.asc()
-    ).all()
+    departments = reference.departments()
 
     # =========================
     # UPCOMING APPOINTMENTS
     # =========================
-    upcoming_appointments = (
-        models.Appointment.query
+    upcoming_appointments = projections.rows(
+        projections.appointment_rows()
         .filter(
             models.Appointment.patient_id == current_user.id,
             models.Appointment.status == "BOOKED",
             models.Appointment.appointment_datetime >= now
         )
-        .order_by(models.Appointment.appointment_datetime.asc())
-        .all()
+        .order_by(models.Appointment.appointment_datetime.asc()),
+        AppointmentRow
     )
 
     # =========================
     # PAST APPOINTMENTS
     # =========================
-    past_appointments = (
-        models.Appointment.query
+    past_appointments = projections.rows(
+        projections.appointment_rows()
         .filter(
             models.Appointment.patient_id == current_user.id,
-            models.Appointment.status.in_(["COMPLETED", "CANCELLED"])
+            models.Appointment.status.in_(["COMPLETED", "CANCELLED", "NO_SHOW"])
         )
-        .order_by(models.Appointment.appointment_datetime.desc())
-        .all()
+        .order_by(models.Appointment.appointment_datetime.desc()),
+        AppointmentRow
     )
 
     return render_template(
@@ -72,6 +86,7 @@ def dashboard():
 # -------------------------------------------------
 @patient_bp.route('/my_history')
 @login_required
+@read_only
 def my_history():
 
     # Ensure only patients can access
@@ -80,15 +95,7 @@ def my_history():
         return redirect(url_for('main.home'))
 
     # Get completed appointments only
-    history = (
-        models.Appointment.query
-        .filter(
-            models.Appointment.patient_id == current_user.id,
-            models.Appointment.status == 'COMPLETED'
-        )
-        .order_by(models.Appointment.appointment_datetime.desc())
-        .all()
-    )
+    history = patient_history(current_user.id)
 
     # Ensure patient profile exists
     profile = current_user.patient_profile
@@ -104,7 +111,7 @@ def my_history():
             (profile.date_of_birth.month, profile.date_of_birth.day)
         )
 
-    return render_template(
+    return stream_page(
         'shared/patient_history.html',
         title='My Appointment History',
         patient=current_user,      
@@ -152,6 +159,8 @@ def profile():
 # -------------------------------------------------
 @patient_bp.route('/department/<int:department_id>')
 @login_required
+@read_only
+@conditional("department", "doctor_profile", "user")
 def department_details(department_id):
     department = models.Department.query.get_or_404(department_id)
 
@@ -178,8 +187,10 @@ def department_details(department_id):
 
 @patient_bp.route('/doctor/<int:doctor_profile_id>')
 @login_required
+@read_only
+@conditional("doctor_profile", "department")
 def doctor_details(doctor_profile_id):
-    doctor_profile = models.DoctorProfile.query.get_or_404(doctor_profile_id)
+    doctor_profile = doctor_profile_or_404(doctor_profile_id)
     return render_template(
         'patient/doctor_details.html',
         title=f"Dr. {doctor_profile.full_name}",
@@ -192,13 +203,14 @@ def doctor_details(doctor_profile_id):
 # -------------------------------------------------
 @patient_bp.route('/book/<int:doctor_profile_id>', methods=['GET', 'POST'])
 @login_required
+@idempotent
 def book_appointment(doctor_profile_id):
 
     if current_user.role != 'patient':
         flash('Only patients can book appointments.', 'danger')
         return redirect(url_for('main.home'))
 
-    doctor_profile = models.DoctorProfile.query.get_or_404(doctor_profile_id)
+    doctor_profile = doctor_profile_or_404(doctor_profile_id)
 
     if request.method == "POST":
 
@@ -211,6 +223,9 @@ def book_appointment(doctor_profile_id):
         try:
             appointment_datetime = datetime.fromisoformat(slot_value)
         except ValueError:
+            appointment_datetime = None
+
+        if appointment_datetime is None or appointment_datetime.tzinfo is not None:
             flash("Invalid time slot selected.", "danger")
             return redirect(request.url)
 
@@ -218,26 +233,36 @@ def book_appointment(doctor_profile_id):
             flash("You cannot book a past time slot.", "warning")
             return redirect(request.url)
 
-        conflict = models.Appointment.query.filter_by(
-            doctor_id=doctor_profile.user_id,
-            appointment_datetime=appointment_datetime,
-            status="BOOKED"
-        ).first()
-
-        if conflict:
-            flash("This slot was just booked by another patient.", "danger")
+        # Check and insert under the slot lock, so two patients can't both
+        # see the slot free and book it
+        try:
+            with slot_lock(doctor_profile.user_id, appointment_datetime):
+                conflict = models.Appointment.query.filter_by(
+                    doctor_id=doctor_profile.user_id,
+                    appointment_datetime=appointment_datetime,
+                    status="BOOKED"
+                ).first()
+
+                if conflict:
+                    db.session.rollback()
+                    flash("This slot was just booked by another patient.", "danger")
+                    return redirect(request.url)
+
+                appointment = models.Appointment(
+                    patient_id=current_user.id,
+                    doctor_id=doctor_profile.user_id,
+                    appointment_datetime=appointment_datetime,
+                    status="BOOKED"
+                )
+
+                db.session.add(appointment)
+                db.session.commit()
+
+        except SlotBusy:
+            db.session.rollback()
+            flash("This slot is being booked by someone else. Please try again.", "warning")
             return redirect(request.url)
 
-        appointment = models.Appointment(
-            patient_id=current_user.id,
-            doctor_id=doctor_profile.user_id,
-            appointment_datetime=appointment_datetime,
-            status="BOOKED"
-        )
-
-        db.session.add(appointment)
-        db.session.commit()
-
         flash("Appointment booked successfully!", "success")
         return redirect(url_for("patient.dashboard"))
 
@@ -255,6 +280,8 @@ def book_appointment(doctor_profile_id):
 # -------------------------------------------------
 @patient_bp.route("/doctor/<int:doctor_id>/slots")
 @login_required
+@read_only
+@conditional("availability", "appointment", "doctor_profile", navbar=False)
 def get_doctor_slots(doctor_id):
 
     date_str = request.args.get("date")
@@ -266,7 +293,7 @@ def get_doctor_slots(doctor_id):
     except ValueError:
         abort(400)
 
-    doctor = DoctorProfile.query.get_or_404(doctor_id)
+    doctor = doctor_profile_or_404(doctor_id)
 
     slots = get_available_slots(doctor, selected_date)
 
@@ -280,11 +307,80 @@ def get_doctor_slots(doctor_id):
             for slot in slots
         ]
     })
+
+
+# -------------------------------------------------
+# Recurring Series API
+# -------------------------------------------------
+@patient_bp.route("/doctor/<int:doctor_profile_id>/series", methods=["POST"])
+@login_required
+def book_series(doctor_profile_id):
+    """
+    Book the same weekly slot several times, from a JSON body:
+
+        {"start": "2026-11-02T10:00", "count": 8, "interval_weeks": 1,
+         "atomic": false}
+
+    201 with the booked appointments and the conflicting occurrences, or
+    409 when nothing could be booked.
+    """
+    if current_user.role != "patient":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    doctor_profile = doctor_profile_or_404(doctor_profile_id)
+    data = request.get_json(silent=True) or {}
+
+    try:
+        first = datetime.fromisoformat(data["start"])
+        count = int(data.get("count", 1))
+        interval_weeks = int(data.get("interval_weeks", 1))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "start must be an ISO date and time."}), 400
+
+    # Appointment times are the hospital's local time, without an offset
+    if first.tzinfo is not None:
+        return jsonify({"error": "start must be a local time without a UTC offset."}), 400
+
+    if not (
+        1 <= count <= booking.MAX_OCCURRENCES
+        and 1 <= interval_weeks <= booking.MAX_INTERVAL_WEEKS
+    ):
+        return jsonify({
+            "error": f"count must be 1-{booking.MAX_OCCURRENCES} and "
+                     f"interval_weeks 1-{booking.MAX_INTERVAL_WEEKS}."
+        }), 400
+
+    try:
+        result = booking.book_series(
+            current_user.id,
+            doctor_profile,
+            first,
+            count,
+            interval_weeks,
+            atomic=bool(data.get("atomic"))
+        )
+    except SlotBusy:
+        db.session.rollback()
+        return jsonify({"error": "These slots are being booked right now. Please try again."}), 409
+
+    return jsonify({
+        "booked": [
+            {"id": appointment_id, "appointment_datetime": when.isoformat()}
+            for when, appointment_id in result.booked
+        ],
+        "conflicts": [
+            {"appointment_datetime": c.appointment_datetime.isoformat(), "reason": c.reason}
+            for c in result.conflicts
+        ]
+    }), 201 if result.booked else 409
+
+
 # -------------------------------------------------
 # Cancel Appointment
 # -------------------------------------------------
 @patient_bp.route("/appointment/<int:appointment_id>/cancel", methods=["POST"])
 @login_required
+@idempotent
 def cancel_appointment(appointment_id):
     if current_user.role != "patient":
         flash("Unauthorized action.", "danger")
@@ -305,26 +401,22 @@ def cancel_appointment(appointment_id):
         flash("This appointment cannot be cancelled.", "warning")
         return redirect(url_for("patient.dashboard"))
 
-    # Status update
-    appointment.status = "CANCELLED"
-
-    # Status history
-    db.session.add(
-        models.AppointmentStatusHistory(
-            appointment=appointment,
-            old_status="BOOKED",
-            new_status="CANCELLED"
+    # Status update, history and doctor notification
+    patient_name = current_user.patient_profile.full_name
+    cancelled = appointments.transition(
+        appointment,
+        "CANCELLED",
+        notify=lambda changed: (
+            changed.doctor_id,
+            "APPOINTMENT_CANCELLED",
+            f"Appointment cancelled by {patient_name}"
         )
     )
 
-    # Notify doctor
-    db.session.add(
-        models.Notification(
-            user_id=appointment.doctor_id,
-            type="APPOINTMENT_CANCELLED",
-            message=f"Appointment cancelled by {current_user.patient_profile.full_name}"
-        )
-    )
+    if not cancelled:
+        db.session.rollback()
+        flash("This appointment cannot be cancelled.", "warning")
+        return redirect(url_for("patient.dashboard"))
 
     db.session.commit()
 
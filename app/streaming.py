@@ -0,0 +1,84 @@
+"""
+Streamed rendering for pages with unbounded row counts.
+
+``stream_page`` sends the page while the template is still rendering, so
+the first byte goes out after the first few KB of HTML, whatever the row
+count. The view should pass queries rather than lists, iterated with
+``yield_per`` so only one batch of rows is in memory at a time.
+
+Headers and the session cookie go out before the body. Anything that
+writes to the session (flashes, writes to the database) must therefore
+happen in the view, before ``stream_page`` is returned.
+"""
+
+from flask import current_app, get_flashed_messages, stream_template, stream_with_context
+from flask_login import current_user
+from sqlalchemy import inspect
+from sqlalchemy.orm import InstanceState, Query, joinedload
+
+from app import db, models
+
+
+YIELD_PER = 200
+CHUNK_SIZE = 8192
+
+
+def _buffered(chunks, size):
+    """Join Jinja's many small fragments into chunks of about ``size`` bytes."""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_page(template_name, **context):
+    # Pop pending flashes now; layout.html reads them after the session
+    # cookie has already been sent
+    get_flashed_messages(with_categories=True)
+
+    # The request's db session is closed when the view returns, and the
+    # template runs in a fresh one: re-attach the objects it will use and
+    # rebind the queries it will iterate
+    instances = [
+        obj for obj in [current_user._get_current_object(), *context.values()]
+        if isinstance(inspect(obj, raiseerr=False), InstanceState)
+    ]
+
+    @stream_with_context
+    def generate():
+        for obj in instances:
+            db.session.add(obj)
+
+        bound = {
+            name: value.with_session(db.session()) if isinstance(value, Query) else value
+            for name, value in context.items()
+        }
+        yield from _buffered(stream_template(template_name, **bound), CHUNK_SIZE)
+
+    return current_app.response_class(generate(), mimetype="text/html")
+
+
+def patient_history(patient_id):
+    """Completed appointments for the history page, newest first, in batches."""
+    Appointment, User, DoctorProfile = models.Appointment, models.User, models.DoctorProfile
+
+    return (
+        Appointment.query
+        .filter(
+            Appointment.patient_id == patient_id,
+            Appointment.status == "COMPLETED"
+        )
+        .options(
+            joinedload(Appointment.doctor)
+            .joinedload(User.doctor_profile)
+            .joinedload(DoctorProfile.department),
+            joinedload(Appointment.treatment),
+        )
+        .order_by(Appointment.appointment_datetime.desc())
+        .yield_per(YIELD_PER)
+    )
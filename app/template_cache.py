@@ -0,0 +1,54 @@
+"""
+Jinja bytecode cache.
+
+Compiled templates are written to TEMPLATE_BYTECODE_CACHE_DIR (default:
+instance/jinja) and reused by every later process, so a fresh worker loads
+bytecode instead of parsing and compiling each template on its first hit.
+
+``flask templates precompile`` fills the cache at build/deploy time. Under
+gunicorn --preload the master also loads every template before forking
+(see gunicorn.conf.py), so workers start with them already in memory.
+"""
+
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_template_cache(app):
+    if not app.config["TEMPLATE_BYTECODE_CACHE"]:
+        return
+
+    directory = app.config["TEMPLATE_BYTECODE_CACHE_DIR"] or os.path.join(
+        app.instance_path, "jinja"
+    )
+    os.makedirs(directory, exist_ok=True)
+
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    app.cli.add_command(templates_cli)
+
+
+def precompile(app):
+    """Load every template once, filling the bytecode and in-memory caches."""
+    names = app.jinja_env.list_templates(extensions=("html",))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+templates_cli = AppGroup("templates", help="Template cache.")
+
+
+@templates_cli.command("precompile")
+@click.option("--clear", is_flag=True, help="Drop existing bytecode first.")
+def precompile_command(clear):
+    """Compile every template into the bytecode cache."""
+    cache = current_app.jinja_env.bytecode_cache
+    if clear:
+        cache.clear()
+
+    names = precompile(current_app)
+    click.echo(f"Compiled {len(names)} templates into {cache.directory}")
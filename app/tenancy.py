@@ -0,0 +1,230 @@
+"""
+Multi-hospital tenancy.
+
+Each hospital branch is a ``Tenant``. Departments, users, appointments,
+availability and notifications carry a ``tenant_id`` (the ``TenantScoped``
+mixin), and every ORM SELECT, UPDATE and DELETE on them is filtered to the
+current tenant automatically, so route code never has to add the filter
+itself and no query reads another tenant's rows. New rows pick up the
+current tenant as their default ``tenant_id``.
+
+The tenant is resolved per request from the host name (``Tenant.hostname``)
+and falls back to the DEFAULT_TENANT slug. Outside a request (CLI, scripts,
+jobs) nothing is filtered unless ``tenant_context`` is used.
+
+A large tenant can live in its own database: give it a ``bind_key``, list
+the URL under that key in TENANT_BINDS and run ``flask tenants init-bind``.
+Its queries are then routed to that engine (see ``RoutingSession`` in
+app/database.py); the tenant registry and version stamps stay on the
+primary.
+
+Statements that really need every tenant can opt out with
+``.execution_options(all_tenants=True)``.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+
+import click
+from flask import abort, current_app, g, has_app_context, request
+from flask.cli import AppGroup
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import declared_attr, with_loader_criteria
+
+from app import db
+from app.database import RoutingSession
+
+
+DEFAULT_TENANT_ID = 1
+
+
+# -----------------------------
+# Current tenant
+# -----------------------------
+def current_tenant_id():
+    return g.get("tenant_id") if has_app_context() else None
+
+
+def default_tenant_id():
+    """Column default for ``tenant_id`` on new rows."""
+    return current_tenant_id() or DEFAULT_TENANT_ID
+
+
+def _activate(tenant):
+    g.tenant = tenant
+    g.tenant_id = tenant.id
+    g.tenant_bind = tenant.bind_key
+
+
+@contextmanager
+def tenant_context(tenant):
+    """Scope queries in a CLI command or job to ``tenant`` (a TenantRef)."""
+    previous = (g.get("tenant"), g.get("tenant_id"), g.get("tenant_bind"))
+    _activate(tenant)
+    try:
+        yield tenant
+    finally:
+        g.tenant, g.tenant_id, g.tenant_bind = previous
+
+
+# -----------------------------
+# Tenant column
+# -----------------------------
+class TenantScoped:
+    """Adds ``tenant_id``; queries on the model are filtered by tenant."""
+
+    @declared_attr
+    def tenant_id(cls):
+        return db.Column(
+            db.Integer,
+            db.ForeignKey("tenant.id"),
+            nullable=False,
+            default=default_tenant_id,
+            server_default=str(DEFAULT_TENANT_ID)
+        )
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _scope_to_tenant(orm_execute_state):
+    tenant_id = current_tenant_id()
+    if (
+        tenant_id is None
+        or orm_execute_state.is_insert
+        or orm_execute_state.is_column_load
+        or orm_execute_state.is_relationship_load
+        or orm_execute_state.execution_options.get("all_tenants", False)
+    ):
+        return
+
+    # Relationship and column loads inherit the criteria from the
+    # statement that loaded the parent object
+    orm_execute_state.statement = orm_execute_state.statement.options(
+        with_loader_criteria(
+            TenantScoped,
+            lambda cls: cls.tenant_id == tenant_id,
+            include_aliases=True
+        )
+    )
+
+
+# -----------------------------
+# Request resolution
+# -----------------------------
+def resolve_tenant():
+    """before_request hook: pick the tenant for this host."""
+    if request.endpoint and request.endpoint.startswith(("static", "assets")):
+        return
+
+    from app import reference
+
+    host = request.host.partition(":")[0].lower()
+    tenants = reference.tenants()
+
+    tenant = next((t for t in tenants if t.hostname == host), None)
+    if tenant is None:
+        default = current_app.config["DEFAULT_TENANT"]
+        tenant = next((t for t in tenants if t.slug == default), None)
+
+    if tenant is None:
+        abort(404)
+
+    _activate(tenant)
+
+
+def ensure_default_tenant():
+    """Create the default tenant if missing (databases built with create_all)."""
+    from app.models import Tenant
+
+    if db.session.get(Tenant, DEFAULT_TENANT_ID) is None:
+        db.session.add(Tenant(
+            id=DEFAULT_TENANT_ID,
+            slug=current_app.config["DEFAULT_TENANT"],
+            name="HealNest"
+        ))
+        db.session.flush()
+        if db.engine.dialect.name == "postgresql":
+            # The id was set by hand, move the sequence past it
+            db.session.execute(text(
+                "SELECT setval(pg_get_serial_sequence('tenant', 'id'), (SELECT MAX(id) FROM tenant))"
+            ))
+        db.session.commit()
+
+
+def init_tenancy(app):
+    app.before_request(resolve_tenant)
+    app.cli.add_command(tenants_cli)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+tenants_cli = AppGroup("tenants", help="Hospital tenants.")
+
+
+@tenants_cli.command("list")
+def list_command():
+    """Show every tenant."""
+    from app.models import Tenant
+
+    for tenant in Tenant.query.order_by(Tenant.id):
+        click.echo(
+            f"{tenant.id:>4}  {tenant.slug:<20} {tenant.hostname or '-':<30} "
+            f"{tenant.bind_key or 'primary'}"
+        )
+
+
+@tenants_cli.command("add")
+@click.argument("slug")
+@click.argument("name")
+@click.option("--hostname", help="Host name that selects this tenant.")
+@click.option("--bind", "bind_key", help="TENANT_BINDS key of its own database.")
+def add_command(slug, name, hostname, bind_key):
+    """Register a hospital branch."""
+    from app.models import Tenant
+
+    if bind_key and bind_key not in current_app.config["TENANT_BINDS"]:
+        raise click.ClickException(f"'{bind_key}' is not listed in TENANT_BINDS.")
+
+    tenant = Tenant(
+        slug=slug,
+        name=name,
+        hostname=hostname.lower() if hostname else None,
+        bind_key=bind_key
+    )
+    db.session.add(tenant)
+    db.session.commit()
+    click.echo(f"Created tenant {tenant.id} ({slug}).")
+
+
+@tenants_cli.command("init-bind")
+@click.argument("slug")
+def init_bind_command(slug):
+    """Create the schema in a tenant's own database."""
+    from app.models import ResourceVersion, Tenant
+
+    tenant = Tenant.query.filter_by(slug=slug).first()
+    if tenant is None or not tenant.bind_key:
+        raise click.ClickException(f"Tenant '{slug}' has no bind.")
+
+    engine = db.engines[tenant.bind_key]
+
+    # Version stamps stay on the primary; the tenant row is copied so the
+    # tenant_id foreign keys hold in the tenant's own database
+    tables = [t for t in db.metadata.sorted_tables if t is not ResourceVersion.__table__]
+    db.metadata.create_all(engine, tables=tables)
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            select(Tenant.id).where(Tenant.id == tenant.id)
+        ).first()
+        if exists is None:
+            conn.execute(Tenant.__table__.insert(), [{
+                "id": tenant.id,
+                "slug": tenant.slug,
+                "name": tenant.name,
+                "hostname": tenant.hostname,
+                "bind_key": tenant.bind_key,
+                "created_at": tenant.created_at or datetime.utcnow(),
+            }])
+
+    click.echo(f"Initialised '{tenant.bind_key}' for tenant {slug}.")
@@ -0,0 +1,157 @@
+"""
+Per-table version stamps.
+
+Every committed transaction bumps a counter in ``resource_version`` for each
+table it wrote to (unit-of-work flushes as well as bulk UPDATE/DELETE/INSERT
+statements run through the session). Views use the stamps to build ETags
+cheaply (see ``conditional`` in app/routes/decorators.py), and the
+``tables_changed`` signal lets in-process caches drop stale entries.
+
+The bump runs in its own short transaction right after the commit, so the
+version rows are never locked for the length of a request.
+"""
+
+import hashlib
+import time
+from datetime import datetime
+
+from blinker import Namespace
+from flask import current_app, g, request
+from flask_login import current_user
+from sqlalchemy import event, inspect, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app import db
+from app.database import RoutingSession
+from app.models import ResourceVersion
+
+
+_signals = Namespace()
+
+# Sent after commit with ``changes``: {table name: set of primary keys, or
+# None when a bulk statement touched an unknown set of rows}
+tables_changed = _signals.signal("tables-changed")
+
+CHANGES_KEY = "changed_rows"
+
+
+# -----------------------------
+# Change tracking
+# -----------------------------
+def _record(db_session, table, pk=None):
+    if table == ResourceVersion.__tablename__:
+        return
+
+    changes = db_session.info.setdefault(CHANGES_KEY, {})
+
+    if pk is None:
+        changes[table] = None
+    elif changes.get(table, set()) is not None:
+        changes.setdefault(table, set()).add(pk)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _collect_flush(db_session, flush_context):
+    dirty = [
+        obj for obj in db_session.dirty
+        if db_session.is_modified(obj, include_collections=False)
+    ]
+
+    for obj in list(db_session.new) + list(db_session.deleted) + dirty:
+        mapper = inspect(obj).mapper
+        pk = mapper.primary_key_from_instance(obj)
+        _record(db_session, mapper.local_table.name, pk[0] if len(pk) == 1 else tuple(pk))
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _collect_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _record(orm_execute_state.session, table.name)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(db_session):
+    changes = db_session.info.pop(CHANGES_KEY, None)
+    if not changes:
+        return
+
+    try:
+        bump(changes)
+    except SQLAlchemyError:
+        current_app.logger.exception("Could not bump resource versions.")
+
+    tables_changed.send(current_app._get_current_object(), changes=changes)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _after_rollback(db_session):
+    db_session.info.pop(CHANGES_KEY, None)
+
+
+# -----------------------------
+# Version stamps
+# -----------------------------
+def bump(tables):
+    tables = sorted(tables)
+    now = datetime.utcnow()
+
+    with db.engine.begin() as conn:
+        result = conn.execute(
+            update(ResourceVersion)
+            .where(ResourceVersion.name.in_(tables))
+            .values(version=ResourceVersion.version + 1, updated_at=now)
+        )
+
+        if result.rowcount < len(tables):
+            existing = set(conn.execute(
+                select(ResourceVersion.name).where(ResourceVersion.name.in_(tables))
+            ).scalars())
+            missing = [t for t in tables if t not in existing]
+
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(ResourceVersion), [
+                        {"name": t, "version": 1, "updated_at": now} for t in missing
+                    ])
+            except IntegrityError:
+                pass  # created concurrently, its first bump is good enough
+
+
+def get_versions(tables):
+    """{table: (version, updated_at)} for the given tables."""
+    rows = db.session.execute(
+        select(ResourceVersion.name, ResourceVersion.version, ResourceVersion.updated_at)
+        .where(ResourceVersion.name.in_(tables))
+    )
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def resource_etag(tables, extra=None, max_age=None):
+    """
+    Strong ETag and Last-Modified for the current request.
+
+    Covers the tenant, the URL, the signed-in user and the version of each
+    table.
+    ``max_age`` (seconds) rolls the ETag over periodically, for pages that
+    embed something time-limited such as a CSRF token.
+    """
+    versions = get_versions(tables)
+
+    parts = [
+        g.get("tenant_id"),
+        request.endpoint,
+        request.full_path,
+        current_user.get_id() if current_user.is_authenticated else "-",
+        extra,
+        int(time.time() // max_age) if max_age else None,
+    ]
+    parts += [f"{t}:{versions.get(t, (0, None))[0]}" for t in sorted(tables)]
+
+    etag = hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+    stamps = [updated_at for _, updated_at in versions.values() if updated_at]
+    last_modified = max(stamps) if stamps else None
+
+    return etag, last_modified
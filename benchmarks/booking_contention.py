@@ -0,0 +1,186 @@
+"""
+Booking contention benchmark.
+
+Signs in as many patients, one thread each, and posts to
+patient.book_appointment concurrently under each slot-lock backend
+(app/locks.py):
+
+    hot      every thread books the same few slots of one doctor, so
+             exactly one booking per slot should win
+    spread   every thread books its own doctor's slots, nothing contends
+
+Reports bookings, rejected attempts, double-booked slots (two BOOKED rows
+for the same doctor and time), throughput and latency. "none" is the old,
+unlocked booking path.
+
+Usage:
+    python benchmarks/booking_contention.py --reuse
+    python benchmarks/booking_contention.py --threads 16 --slots 20
+    python benchmarks/booking_contention.py --backend sqlite --backend local
+"""
+
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+import endpoints as bench
+from app import db
+from app.models import Appointment, DoctorProfile, User
+
+
+SCENARIOS = ("hot", "spread")
+
+
+# -----------------------------
+# Setup
+# -----------------------------
+def sign_in(emails):
+    clients = []
+    for email in emails:
+        client = bench.app.test_client()
+        response = client.post("/login", data={"email": email, "password": bench.PASSWORD})
+        if response.status_code != 302:
+            raise SystemExit(f"Could not sign in as {email}.")
+        clients.append(client)
+    return clients
+
+
+def fixtures(threads):
+    with bench.app.app_context():
+        patients = [
+            email for (email,) in
+            db.session.query(User.email)
+            .filter_by(role="patient", is_active=True, is_deleted=False)
+            .order_by(User.id).limit(threads)
+        ]
+        doctors = [
+            profile_id for (profile_id,) in
+            db.session.query(DoctorProfile.id)
+            .join(User, User.id == DoctorProfile.user_id)
+            .filter(User.is_active == True, User.is_deleted == False)
+            .order_by(DoctorProfile.id).limit(threads)
+        ]
+    if len(patients) < threads or len(doctors) < threads:
+        raise SystemExit("Not enough patients/doctors in the dataset for --threads.")
+    return patients, doctors
+
+
+def clear_bookings(since):
+    with bench.app.app_context():
+        Appointment.query.filter(Appointment.appointment_datetime >= since).delete()
+        db.session.commit()
+
+
+def double_booked(since):
+    with bench.app.app_context():
+        return (
+            db.session.query(Appointment.doctor_id, Appointment.appointment_datetime)
+            .filter(
+                Appointment.appointment_datetime >= since,
+                Appointment.status == "BOOKED"
+            )
+            .group_by(Appointment.doctor_id, Appointment.appointment_datetime)
+            .having(func.count() > 1)
+            .count()
+        )
+
+
+# -----------------------------
+# Run
+# -----------------------------
+def run(backend, scenario, clients, doctors, slots, since):
+    bench.app.config["BOOKING_LOCK_BACKEND"] = backend
+    clear_bookings(since)
+
+    start_line = threading.Barrier(len(clients))
+    timings, outcomes = [], []
+    lock = threading.Lock()
+
+    def worker(index, client):
+        doctor = doctors[0] if scenario == "hot" else doctors[index]
+        url = f"/patient/book/{doctor}"
+        mine, results = [], []
+
+        start_line.wait()
+        for i in range(slots):
+            slot = since + timedelta(minutes=30 * i)
+            started = time.perf_counter()
+            response = client.post(url, data={"selected_slot": slot.isoformat()})
+            mine.append((time.perf_counter() - started) * 1000)
+            results.append(response.headers.get("Location", "").endswith("/patient/dashboard"))
+
+        with lock:
+            timings.extend(mine)
+            outcomes.extend(results)
+
+    threads = [
+        threading.Thread(target=worker, args=(i, client))
+        for i, client in enumerate(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    booked = sum(outcomes)
+    return {
+        "booked": booked,
+        "rejected": len(outcomes) - booked,
+        "double": double_booked(since),
+        "per_sec": len(outcomes) / elapsed,
+        "p50_ms": bench.percentile(timings, 50),
+        "p95_ms": bench.percentile(timings, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HealNest booking contention benchmark.")
+    parser.add_argument("--preset", choices=bench.generate_data.PRESETS, default="small")
+    parser.add_argument("--reuse", action="store_true")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--slots", type=int, default=10, help="slots booked per thread")
+    parser.add_argument(
+        "--backend", action="append",
+        help="lock backend to measure (repeatable), default: none, local and "
+             "the database's own"
+    )
+    args = parser.parse_args()
+
+    bench.load_dataset(args.preset, args.reuse)
+
+    with bench.app.app_context():
+        dialect = db.engine.dialect.name
+    backends = args.backend or ["none", "local", "postgres" if dialect == "postgresql" else "sqlite"]
+
+    patients, doctors = fixtures(args.threads)
+    clients = sign_in(patients)
+
+    # Well past the generated appointments, cleared before every run
+    since = (datetime.now() + timedelta(days=400)).replace(hour=9, minute=0, second=0, microsecond=0)
+
+    print(f"{args.threads} threads x {args.slots} slots on {dialect}")
+    print(
+        f"{'backend':<10} {'scenario':<8} {'booked':>7} {'rejected':>9} {'double':>7} "
+        f"{'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+
+    try:
+        for backend in backends:
+            for scenario in SCENARIOS:
+                result = run(backend, scenario, clients, doctors, args.slots, since)
+                print(
+                    f"{backend:<10} {scenario:<8} {result['booked']:>7} {result['rejected']:>9} "
+                    f"{result['double']:>7} {result['per_sec']:>8.1f} "
+                    f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+                )
+    finally:
+        clear_bookings(since)
+
+
+if __name__ == "__main__":
+    main()
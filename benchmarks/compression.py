@@ -0,0 +1,89 @@
+"""
+Response compression benchmark.
+
+Fetches the main pages through the app (see benchmarks/endpoints.py for the
+dataset and sign-in), then for each one reports the uncompressed size, the
+bytes actually sent with ``Accept-Encoding: gzip`` and, per gzip level (and
+brotli quality, if installed), the compressed size and CPU time to encode.
+
+Usage:
+    python benchmarks/compression.py
+    python benchmarks/compression.py --reuse --repeat 200 --levels 1 6 9
+"""
+
+import argparse
+import gzip
+import time
+
+import endpoints as bench
+from app.compression import brotli
+
+PAGES = [
+    "admin.dashboard",
+    "admin.dashboard_analytics",
+    "admin.manage_doctors",
+    "admin.manage_appointments",
+    "doctor.dashboard",
+    "patient.dashboard",
+    "patient.my_history",
+    "patient.slots",
+]
+
+
+def cpu_us(func, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HealNest compression benchmark.")
+    parser.add_argument("--preset", choices=bench.generate_data.PRESETS, default="small")
+    parser.add_argument("--reuse", action="store_true")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+    args = parser.parse_args()
+
+    bench.load_dataset(args.preset, args.reuse)
+    fixtures = bench.pick_fixtures()
+    role_clients = bench.clients(fixtures)
+    urls = {name: (role, url) for name, role, url in bench.endpoints(fixtures)}
+
+    columns = [f"gzip-{level}" for level in args.levels]
+    if brotli is not None:
+        columns.append("br-4")
+
+    header = f"{'endpoint':<28} {'raw':>8} {'wire':>8}"
+    for column in columns:
+        header += f" {column:>9} {'us':>7}"
+    print(header)
+
+    totals = {"raw": 0, "wire": 0}
+
+    for name in PAGES:
+        role, url = urls[name]
+        client = role_clients[role]
+
+        raw = client.get(url).get_data()
+        wire = client.get(url, headers={"Accept-Encoding": "gzip"}).get_data()
+        totals["raw"] += len(raw)
+        totals["wire"] += len(wire)
+
+        line = f"{name:<28} {len(raw):>8} {len(wire):>8}"
+        for level in args.levels:
+            size = len(gzip.compress(raw, compresslevel=level, mtime=0))
+            spent = cpu_us(lambda: gzip.compress(raw, compresslevel=level, mtime=0), args.repeat)
+            line += f" {size:>9} {spent:>7.0f}"
+        if brotli is not None:
+            size = len(brotli.compress(raw, quality=4))
+            spent = cpu_us(lambda: brotli.compress(raw, quality=4), args.repeat)
+            line += f" {size:>9} {spent:>7.0f}"
+        print(line)
+
+    saved = 1 - totals["wire"] / totals["raw"] if totals["raw"] else 0
+    print(f"\nTotal {totals['raw']} -> {totals['wire']} bytes on the wire ({saved:.0%} saved)")
+
+
+if __name__ == "__main__":
+    main()
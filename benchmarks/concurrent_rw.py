@@ -0,0 +1,158 @@
+"""
+Concurrent read/write benchmark for SQLite engine tuning.
+
+Runs reader threads (dashboard-style appointment queries) alongside writer
+threads (booking + notification inserts) against a file database, once with
+SQLite's defaults (rollback journal, synchronous=FULL) and once with the
+tuned pragmas from app/database.py (WAL, synchronous=NORMAL, mmap).
+
+Usage:
+    python benchmarks/concurrent_rw.py [--readers 8] [--writers 2]
+        [--seconds 5] [--database-url postgresql://...]
+
+With --database-url only that database is measured with the current config.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import Appointment, Notification, User  # noqa: E402
+import generate_data  # noqa: E402
+
+DEFAULTS = {
+    "SQLITE_JOURNAL_MODE": "DELETE",
+    "SQLITE_SYNCHRONOUS": "FULL",
+    "SQLITE_MMAP_SIZE": 0,
+}
+TUNED = {}
+
+DATASET = dict(departments=4, doctors=20, patients=500, appointments=20_000)
+
+
+def build(uri, overrides):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": uri,
+        "PASSWORD_POOL_WORKERS": 0,
+        "BCRYPT_LOG_ROUNDS": 4,
+        **overrides,
+    })
+    with app.app_context():
+        generate_data.generate(reset=True, **DATASET)
+        doctor_ids = [u.id for u in User.query.filter_by(role="doctor")]
+        patient_ids = [u.id for u in User.query.filter_by(role="patient").limit(200)]
+    return app, doctor_ids, patient_ids
+
+
+def run(label, app, doctor_ids, patient_ids, readers, writers, seconds):
+    stop = time.perf_counter() + seconds
+    stats = {"read": [], "write": [], "errors": 0}
+    lock = threading.Lock()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    (
+                        Appointment.query
+                        .filter(
+                            Appointment.doctor_id == rng.choice(doctor_ids),
+                            Appointment.status == "BOOKED",
+                        )
+                        .order_by(Appointment.appointment_datetime.desc())
+                        .limit(20)
+                        .all()
+                    )
+                    db.session.rollback()
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        stats["read"].append(elapsed)
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        stats["errors"] += 1
+
+    def writer(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    patient_id = rng.choice(patient_ids)
+                    db.session.add(Appointment(
+                        patient_id=patient_id,
+                        doctor_id=rng.choice(doctor_ids),
+                        appointment_datetime=datetime.now() + timedelta(minutes=rng.randint(1, 10**6)),
+                        status="BOOKED",
+                    ))
+                    db.session.add(Notification(
+                        user_id=patient_id,
+                        type="APPOINTMENT_BOOKED",
+                        message="Benchmark booking.",
+                    ))
+                    db.session.commit()
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        stats["write"].append(elapsed)
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        stats["errors"] += 1
+
+    threads = (
+        [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        + [threading.Thread(target=writer, args=(100 + i,)) for i in range(writers)]
+    )
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    def p95(values):
+        values = sorted(values)
+        return values[int(len(values) * 0.95) - 1] * 1000 if values else 0
+
+    print(
+        f"{label:<10} reads {len(stats['read']) / seconds:8.1f}/s (p95 {p95(stats['read']):6.1f} ms)   "
+        f"writes {len(stats['write']) / seconds:7.1f}/s (p95 {p95(stats['write']):6.1f} ms)   "
+        f"errors {stats['errors']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent read/write benchmark.")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    if args.database_url:
+        modes = [("current", args.database_url, TUNED)]
+    else:
+        directory = tempfile.mkdtemp()
+        modes = [
+            ("default", f"sqlite:///{os.path.join(directory, 'default.db')}", DEFAULTS),
+            ("tuned", f"sqlite:///{os.path.join(directory, 'tuned.db')}", TUNED),
+        ]
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s each")
+    for label, uri, overrides in modes:
+        app, doctor_ids, patient_ids = build(uri, overrides)
+        run(label, app, doctor_ids, patient_ids, args.readers, args.writers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+Endpoint benchmark suite.
+
+Loads a generated dataset (see generate_data.py), signs in as each role and
+drives every blueprint GET endpoint through the Flask test client, plus
+the main write paths: booking, cancelling and treating an appointment.
+Each write gets a fresh appointment or slot, set up outside the timing.
+Other POST routes (profile, availability, leave and admin forms) are out
+of scope. For each endpoint it reports p50/p95/p99 latency, SQL queries per request and peak
+memory allocated while handling the request, then compares against a stored
+baseline and exits non-zero on regressions beyond --threshold.
+
+Usage:
+    python benchmarks/endpoints.py --save-baseline
+    python benchmarks/endpoints.py                      # compare
+    python benchmarks/endpoints.py --preset medium --requests 50
+    python benchmarks/endpoints.py --only admin. --only patient.slots
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from functools import partial
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_FILE = os.path.join(tempfile.gettempdir(), "healnest_bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.booking import SLOT_DURATION  # noqa: E402
+from app.models import (  # noqa: E402
+    Appointment,
+    Availability,
+    Department,
+    User,
+)
+import generate_data  # noqa: E402
+
+app = create_app({"WTF_CSRF_ENABLED": False, "PASSWORD_POOL_WORKERS": 0})
+
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baseline.json")
+PASSWORD = "password123"
+ADMIN_EMAIL = "admin@bench.healnest.com"
+
+
+# -----------------------------
+# Dataset
+# -----------------------------
+def load_dataset(preset, reuse):
+    app.config["BCRYPT_LOG_ROUNDS"] = 4
+
+    with app.app_context():
+        if not reuse or not db.inspect(db.engine).has_table("user"):
+            generate_data.generate(
+                reset=True, password=PASSWORD, **generate_data.PRESETS[preset]
+            )
+
+        if not User.query.filter_by(email=ADMIN_EMAIL).first():
+            admin = User(email=ADMIN_EMAIL, role="admin", must_change_password=False)
+            admin.set_password(PASSWORD)
+            db.session.add(admin)
+            db.session.commit()
+
+
+def pick_fixtures():
+    """Ids the endpoint URLs need, chosen from the generated data."""
+    with app.app_context():
+        now = datetime.now()
+
+        booked = (
+            Appointment.query
+            .join(User, User.id == Appointment.doctor_id)
+            .filter(
+                Appointment.status == "BOOKED",
+                Appointment.appointment_datetime >= now,
+                User.is_active == True,
+                User.is_deleted == False
+            )
+            .order_by(Appointment.id)
+            .first()
+        )
+        doctor = db.session.get(User, booked.doctor_id)
+        patient = (
+            User.query
+            .join(Appointment, Appointment.patient_id == User.id)
+            .filter(
+                Appointment.status == "COMPLETED",
+                User.is_active == True,
+                User.is_deleted == False
+            )
+            .first()
+        )
+
+        return {
+            "admin_email": ADMIN_EMAIL,
+            "doctor_email": doctor.email,
+            "patient_email": patient.email,
+            "doctor_user_id": doctor.id,
+            "doctor_profile_id": doctor.doctor_profile.id,
+            "patient_user_id": patient.id,
+            "department_id": Department.query.order_by(Department.id).first().id,
+            "tenant_id": booked.tenant_id,
+            "appointment_id": booked.id,
+            "search_term": doctor.doctor_profile.full_name.split()[0],
+            "slot_date": (date.today() + timedelta(days=1)).isoformat(),
+        }
+
+
+# -----------------------------
+# Endpoints
+# -----------------------------
+def endpoints(f):
+    """(name, role, url) for every GET endpoint, role None = anonymous."""
+    return [
+        # main
+        ("main.home", None, "/"),
+        ("main.login", None, "/login"),
+        ("main.register", None, "/register"),
+        ("main.search", "admin", f"/search?query={f['search_term']}"),
+        ("main.notifications[admin]", "admin", "/notifications"),
+        ("main.notifications[doctor]", "doctor", "/notifications"),
+        ("main.notifications[patient]", "patient", "/notifications"),
+
+        # admin
+        ("admin.dashboard", "admin", "/admin/dashboard"),
+        ("admin.dashboard_analytics", "admin", "/admin/dashboard/analytics"),
+        ("admin.add_doctor", "admin", "/admin/add_doctor"),
+        ("admin.manage_doctors", "admin", "/admin/doctors"),
+        ("admin.manage_doctors[sorted]", "admin", "/admin/doctors?sort=name&order=asc&page=3"),
+        ("admin.edit_doctor", "admin", f"/admin/doctor/edit/{f['doctor_user_id']}"),
+        ("admin.manage_patients", "admin", "/admin/patients"),
+        ("admin.manage_patients[sorted]", "admin", "/admin/patients?sort=name&order=asc&page=50"),
+        ("admin.edit_patient", "admin", f"/admin/patient/edit/{f['patient_user_id']}"),
+        ("admin.manage_departments", "admin", "/admin/departments"),
+        ("admin.department_details", "admin", f"/admin/departments/{f['department_id']}"),
+        ("admin.manage_appointments", "admin", "/admin/appointments"),
+        ("admin.manage_appointments[filtered]", "admin",
+         f"/admin/appointments?doctor_id={f['doctor_user_id']}&status=BOOKED"),
+        ("admin.view_patient_history", "admin", f"/admin/patient/{f['patient_user_id']}/history"),
+
+        # doctor
+        ("doctor.dashboard", "doctor", "/doctor/dashboard"),
+        ("doctor.treat_patient", "doctor", f"/doctor/treat/{f['appointment_id']}"),
+        ("doctor.profile", "doctor", "/doctor/profile"),
+        ("doctor.manage_availability", "doctor", "/doctor/manage-availability"),
+        ("doctor.change_password", "doctor", "/doctor/change-password"),
+        ("doctor.view_patient_history", "doctor", f"/doctor/patient/{f['patient_user_id']}/history"),
+
+        # patient
+        ("patient.dashboard", "patient", "/patient/dashboard"),
+        ("patient.my_history", "patient", "/patient/my_history"),
+        ("patient.profile", "patient", "/patient/profile"),
+        ("patient.department_details", "patient", f"/patient/department/{f['department_id']}"),
+        ("patient.doctor_details", "patient", f"/patient/doctor/{f['doctor_profile_id']}"),
+        ("patient.book_appointment", "patient", f"/patient/book/{f['doctor_profile_id']}"),
+        ("patient.slots", "patient",
+         f"/patient/doctor/{f['doctor_profile_id']}/slots?date={f['slot_date']}"),
+    ]
+
+
+# Write targets start a year out, well past the generated appointments, in
+# working hours the benchmark makes the doctor available for
+WRITE_HORIZON = timedelta(days=365)
+WRITE_HOURS = (timedelta(hours=9), timedelta(hours=17))
+
+
+def open_slot(f):
+    """
+    A slot nobody has an appointment in yet, after any earlier run's, in
+    an availability block of the doctor's (created if the day has none).
+    """
+    with app.app_context():
+        latest = (
+            db.session.query(db.func.max(Appointment.appointment_datetime))
+            .filter(Appointment.doctor_id == f["doctor_user_id"])
+            .scalar()
+        )
+        day = datetime.combine(date.today() + WRITE_HORIZON, datetime.min.time())
+        slot = day + WRITE_HOURS[0]
+        if latest and latest >= slot:
+            day = datetime.combine(latest.date(), datetime.min.time())
+            slot = latest + SLOT_DURATION
+        if slot + SLOT_DURATION > day + WRITE_HOURS[1]:
+            day += timedelta(days=1)
+            slot = day + WRITE_HOURS[0]
+
+        available = Availability.query.filter_by(
+            doctor_profile_id=f["doctor_profile_id"], available_date=day.date()
+        ).first()
+        if not available:
+            db.session.add(Availability(
+                tenant_id=f["tenant_id"],
+                doctor_profile_id=f["doctor_profile_id"],
+                available_date=day.date(),
+                start_time=(day + WRITE_HOURS[0]).time(),
+                end_time=(day + WRITE_HOURS[1]).time()
+            ))
+            db.session.commit()
+
+    return slot
+
+
+def booked_appointment(f):
+    """Book a fresh appointment between the benchmark patient and doctor."""
+    slot = open_slot(f)
+    with app.app_context():
+        appointment = Appointment(
+            tenant_id=f["tenant_id"],
+            patient_id=f["patient_user_id"],
+            doctor_id=f["doctor_user_id"],
+            appointment_datetime=slot,
+            status="BOOKED"
+        )
+        db.session.add(appointment)
+        db.session.commit()
+        return appointment.id
+
+
+def write_endpoints(f):
+    """
+    (name, role, prepare) for the main POST paths. ``prepare()`` sets up a
+    fresh target and returns (url, form data); every one should redirect.
+    """
+    return [
+        ("patient.book_appointment[POST]", "patient", lambda: (
+            f"/patient/book/{f['doctor_profile_id']}",
+            {"selected_slot": open_slot(f).isoformat()},
+        )),
+        ("patient.cancel_appointment[POST]", "patient", lambda: (
+            f"/patient/appointment/{booked_appointment(f)}/cancel",
+            {},
+        )),
+        ("doctor.treat_patient[POST]", "doctor", lambda: (
+            f"/doctor/treat/{booked_appointment(f)}",
+            {
+                "visit_type": "Follow-up",
+                "tests_done": "ECG",
+                "diagnosis": "Benchmark diagnosis.",
+                "prescription": "Paracetamol 500mg (1-0-1) for 3 days.",
+            },
+        )),
+    ]
+
+
+def clients(f):
+    result = {None: app.test_client()}
+    for role in ("admin", "doctor", "patient"):
+        client = app.test_client()
+        response = client.post(
+            "/login", data={"email": f[f"{role}_email"], "password": PASSWORD}
+        )
+        if response.status_code != 302:
+            raise SystemExit(f"Could not sign in as {role}.")
+        result[role] = client
+    return result
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+class QueryCounter:
+    """Counts statements on every engine: primary, replica and tenant binds."""
+
+    def __init__(self, engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self)
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def sender(client, target):
+    """
+    Returns ``send()``, which readies one request (outside the timing) and
+    returns a callable that issues it. ``target`` is a GET url or a
+    ``prepare`` from write_endpoints.
+    """
+    if callable(target):
+        def send():
+            url, data = target()
+            return partial(client.post, url, data=data)
+        return send
+    return lambda: partial(client.get, target)
+
+
+def measure(send, requests, warmup, counter):
+    for _ in range(warmup):
+        send()().get_data()
+
+    timings = []
+    queries = 0
+    status = None
+
+    for _ in range(requests):
+        issue = send()
+        counter.count = 0
+        start = time.perf_counter()
+        response = issue()
+        response.get_data()
+        timings.append((time.perf_counter() - start) * 1000)
+        queries = counter.count
+        status = response.status_code
+
+    # Allocation pass, separate so tracing overhead doesn't skew latency
+    issue = send()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    issue().get_data()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "status": status,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "queries": queries,
+        "alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms"
+            )
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: queries {previous['queries']} -> {current['queries']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HealNest endpoint benchmarks.")
+    parser.add_argument("--preset", choices=generate_data.PRESETS, default="small")
+    parser.add_argument("--reuse", action="store_true",
+                        help="Reuse the existing benchmark database.")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed p95 slowdown before failing (0.25 = 25%%).")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--only", action="append", default=[],
+                        help="Only run endpoints whose name starts with this.")
+    args = parser.parse_args()
+
+    load_dataset(args.preset, args.reuse)
+    fixtures = pick_fixtures()
+    role_clients = clients(fixtures)
+
+    with app.app_context():
+        counter = QueryCounter(db.engines.values())
+
+    results = {}
+    print(f"{'endpoint':<40} {'status':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'alloc KB':>9}")
+
+    for name, role, target in endpoints(fixtures) + write_endpoints(fixtures):
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+
+        send = sender(role_clients[role], target)
+        result = measure(send, args.requests, args.warmup, counter)
+        results[name] = result
+        print(
+            f"{name:<40} {result['status']:>6} {result['p50_ms']:>8.2f} "
+            f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{result['queries']:>8} {result['alloc_kb']:>9.1f}"
+        )
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump({"preset": args.preset, "results": results}, fh, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline found, run with --save-baseline first.")
+        return
+
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+
+    if baseline.get("preset") != args.preset:
+        print(f"\nBaseline was recorded with preset '{baseline.get('preset')}', skipping comparison.")
+        return
+
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+    print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
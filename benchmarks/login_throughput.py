@@ -0,0 +1,131 @@
+"""
+Login throughput benchmark.
+
+Fires concurrent logins at /login through the Flask test client while a
+probe thread keeps requesting a cheap page, once with bcrypt inline on the
+request thread and once through the password pool. Reports logins/sec and
+the probe latency, which is what other users feel during a login burst.
+
+Usage:
+    python benchmarks/login_throughput.py [--users 20] [--threads 8]
+        [--logins 10] [--workers 4] [--rounds 12]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_login.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_FILE}")
+
+from app import create_app, db  # noqa: E402
+from app.models import User, PatientProfile  # noqa: E402
+from app.passwords import hasher  # noqa: E402
+from app.tenancy import ensure_default_tenant  # noqa: E402
+
+app = create_app({"WTF_CSRF_ENABLED": False})
+PASSWORD = "benchmark123"
+
+
+def setup(users, rounds):
+    app.config["BCRYPT_LOG_ROUNDS"] = rounds
+    app.config["PASSWORD_POOL_WORKERS"] = 0
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        ensure_default_tenant()
+
+        password_hash = hasher.hash(PASSWORD)
+        for i in range(users):
+            user = User(
+                email=f"bench{i}@bench.healnest.com",
+                role="patient",
+                password_hash=password_hash
+            )
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(PatientProfile(user_id=user.id, full_name=f"Bench {i}"))
+        db.session.commit()
+
+
+def run(users, threads, logins, workers):
+    hasher.shutdown()
+    app.config["PASSWORD_POOL_WORKERS"] = workers
+    app.config["PASSWORD_POOL_MAX_QUEUE"] = max(threads, workers * 8)
+
+    done = threading.Event()
+    probe_latencies = []
+    failures = []
+
+    def probe():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get("/login")
+            probe_latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    def login_worker(n):
+        client = app.test_client()
+        for i in range(logins):
+            email = f"bench{(n * logins + i) % users}@bench.healnest.com"
+            response = client.post("/login", data={"email": email, "password": PASSWORD})
+            if response.status_code != 302:
+                failures.append(email)
+            client.get("/logout")
+
+    probe_thread = threading.Thread(target=probe)
+    probe_thread.start()
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=login_worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    probe_thread.join()
+    hasher.shutdown()
+
+    if failures:
+        raise SystemExit(f"{len(failures)} logins failed, e.g. {failures[0]}.")
+
+    total = threads * logins
+    probe_latencies.sort()
+    p95 = probe_latencies[int(len(probe_latencies) * 0.95) - 1] if probe_latencies else 0
+
+    label = "inline" if workers == 0 else f"pool({workers})"
+    print(
+        f"{label:<10} {total / elapsed:8.1f} logins/s   "
+        f"probe p50 {statistics.median(probe_latencies or [0]) * 1000:7.1f} ms   "
+        f"probe p95 {p95 * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+
+    setup(args.users, args.rounds)
+
+    print(f"{args.threads} threads x {args.logins} logins, bcrypt cost {args.rounds}")
+    run(args.users, args.threads, args.logins, workers=0)
+    run(args.users, args.threads, args.logins, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
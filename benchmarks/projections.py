@@ -0,0 +1,141 @@
+"""
+ORM entities vs row projections for the list pages.
+
+For each list, loads the same rows twice, once as ORM entities (reading the
+attributes the template prints, so lazy loads are counted) and once through
+app/projections.py, and reports latency, SQL queries and peak memory.
+
+Usage:
+    python benchmarks/projections.py
+    python benchmarks/projections.py --reuse --limit 1000 --repeat 20
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import endpoints as bench
+from app import db, projections
+from app.models import Appointment, DoctorProfile, PatientProfile, User
+from app.projections import AppointmentRow, DoctorRow, PatientRow
+
+
+# -----------------------------
+# The two ways of loading each list
+# -----------------------------
+def orm_doctors(limit):
+    doctors = (
+        User.query.filter_by(role="doctor", is_deleted=False)
+        .join(DoctorProfile).order_by(User.created_at.desc()).limit(limit).all()
+    )
+    return [
+        (d.id, d.email, d.is_active, d.doctor_profile.full_name, d.doctor_profile.department.name)
+        for d in doctors
+    ]
+
+
+def projected_doctors(limit):
+    return projections.rows(
+        projections.doctor_rows().order_by(User.created_at.desc()).limit(limit), DoctorRow
+    )
+
+
+def orm_patients(limit):
+    patients = (
+        User.query.filter_by(role="patient", is_deleted=False)
+        .join(PatientProfile).order_by(User.created_at.desc()).limit(limit).all()
+    )
+    return [
+        (p.id, p.email, p.is_active, p.patient_profile.full_name, p.patient_profile.contact_number)
+        for p in patients
+    ]
+
+
+def projected_patients(limit):
+    return projections.rows(
+        projections.patient_rows().order_by(User.created_at.desc()).limit(limit), PatientRow
+    )
+
+
+def orm_appointments(limit):
+    appointments = (
+        Appointment.query.order_by(Appointment.appointment_datetime.desc()).limit(limit).all()
+    )
+    return [
+        (
+            a.id, a.appointment_datetime, a.status,
+            a.patient.patient_profile.full_name,
+            a.doctor.doctor_profile.full_name,
+            a.doctor.doctor_profile.department.name,
+        )
+        for a in appointments
+    ]
+
+
+def projected_appointments(limit):
+    return projections.rows(
+        projections.appointment_rows().order_by(Appointment.appointment_datetime.desc()).limit(limit),
+        AppointmentRow,
+    )
+
+
+CASES = [
+    ("doctors", orm_doctors, projected_doctors),
+    ("patients", orm_patients, projected_patients),
+    ("appointments", orm_appointments, projected_appointments),
+]
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def measure(func, limit, repeat, counter):
+    timings = []
+    for _ in range(repeat):
+        db.session.remove()  # cold identity map, as in a fresh request
+        counter.count = 0
+        start = time.perf_counter()
+        rows = func(limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    queries = counter.count
+
+    db.session.remove()
+    tracemalloc.start()
+    func(limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rows": len(rows),
+        "p50_ms": bench.percentile(timings, 50),
+        "queries": queries,
+        "alloc_kb": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HealNest projection benchmark.")
+    parser.add_argument("--preset", choices=bench.generate_data.PRESETS, default="small")
+    parser.add_argument("--reuse", action="store_true")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    bench.load_dataset(args.preset, args.reuse)
+
+    print(f"{'list':<14} {'loader':<10} {'rows':>6} {'p50 ms':>9} {'queries':>8} {'alloc KB':>10}")
+
+    with bench.app.app_context():
+        counter = bench.QueryCounter(db.engines.values())
+
+        for name, orm, projected in CASES:
+            for label, func in (("orm", orm), ("projection", projected)):
+                result = measure(func, args.limit, args.repeat, counter)
+                print(
+                    f"{name:<14} {label:<10} {result['rows']:>6} {result['p50_ms']:>9.2f} "
+                    f"{result['queries']:>8} {result['alloc_kb']:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
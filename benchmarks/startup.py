@@ -0,0 +1,93 @@
+"""
+Startup time benchmark.
+
+Measures, in fresh interpreter processes:
+
+    import      ``import app`` (what models, scripts and tests pay)
+    create_app  building the app from the factory
+    first req   the first request served by that app
+    forked      first request in a worker forked from a preloaded master
+                (what gunicorn --preload workers pay)
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--config production]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+import app as package
+t1 = time.perf_counter()
+app = package.create_app({config!r})
+t2 = time.perf_counter()
+
+# Requests need the tables and a tenant (not timed)
+from app.tenancy import ensure_default_tenant
+def prepare(app):
+    with app.app_context():
+        package.db.create_all()
+        ensure_default_tenant()
+
+prepare(app)
+t_ready = time.perf_counter()
+status = app.test_client().get("/login").status_code
+t3 = time.perf_counter()
+assert status == 200, f"/login returned {{status}}"
+
+app2 = package.create_app({config!r})
+prepare(app2)
+read_fd, write_fd = os.pipe()
+if os.fork() == 0:
+    start = time.perf_counter()
+    app2.test_client().get("/login")
+    os.write(write_fd, str(time.perf_counter() - start).encode())
+    os._exit(0)
+os.close(write_fd)
+os.wait()
+forked = float(os.read(read_fd, 64))
+
+print(json.dumps({{
+    "import": t1 - t0,
+    "create_app": t2 - t1,
+    "first req": t3 - t_ready,
+    "forked": forked,
+}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HealNest startup benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--config", default="production")
+    args = parser.parse_args()
+
+    code = PROBE.format(root=ROOT, config=args.config)
+    env = dict(os.environ, PASSWORD_POOL_WORKERS="0")
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.check_output([sys.executable, "-c", code], env=env, cwd=ROOT)
+        samples.append(json.loads(output))
+
+    print(f"{'phase':<12} {'median ms':>10} {'min ms':>10}")
+    for phase in samples[0]:
+        values = [s[phase] * 1000 for s in samples]
+        print(f"{phase:<12} {statistics.median(values):>10.1f} {min(values):>10.1f}")
+
+    cold = [(s["import"] + s["create_app"] + s["first req"]) * 1000 for s in samples]
+    print(f"\nimport-to-first-request: {statistics.median(cold):.1f} ms cold, "
+          f"{statistics.median(s['forked'] * 1000 for s in samples):.1f} ms in a preloaded worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Template cold-start benchmark.
+
+Times loading each template in a fresh interpreter, as a new worker does on
+its first hit, in three modes:
+
+    compile     no bytecode cache, every template is parsed and compiled
+    bytecode    compiled templates read from a precompiled bytecode cache
+    preloaded   templates loaded in a parent process before fork (gunicorn
+                --preload + when_ready), measured in the forked child
+
+Usage:
+    python benchmarks/template_cold_start.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+from app import create_app
+from app.template_cache import precompile
+
+app = create_app({config!r})
+env = app.jinja_env
+names = env.list_templates(extensions=("html",))
+
+def load_all():
+    timings = {{}}
+    for name in names:
+        start = time.perf_counter()
+        env.get_template(name)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+if {mode!r} == "preloaded":
+    precompile(app)
+    read_fd, write_fd = os.pipe()
+    if os.fork() == 0:
+        os.write(write_fd, json.dumps(load_all()).encode())
+        os._exit(0)
+    os.close(write_fd)
+    os.wait()
+    chunks = []
+    while chunk := os.read(read_fd, 65536):
+        chunks.append(chunk)
+    print(b"".join(chunks).decode())
+else:
+    print(json.dumps(load_all()))
+"""
+
+
+def run(mode, cache_dir):
+    config = {
+        "TEMPLATE_BYTECODE_CACHE": mode != "compile",
+        "TEMPLATE_BYTECODE_CACHE_DIR": cache_dir,
+        "PASSWORD_POOL_WORKERS": 0,
+    }
+    output = subprocess.check_output(
+        [sys.executable, "-c", PROBE.format(root=ROOT, config=config, mode=mode)],
+        cwd=ROOT,
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HealNest template cold-start benchmark.")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = ("compile", "bytecode", "preloaded")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        run("bytecode", cache_dir)  # fill the cache, like `flask templates precompile`
+
+        samples = {mode: {} for mode in modes}
+        for _ in range(args.runs):
+            for mode in modes:
+                for name, seconds in run(mode, cache_dir).items():
+                    samples[mode].setdefault(name, []).append(seconds * 1000)
+
+    print(f"{'template':<40}" + "".join(f" {mode:>10}" for mode in modes) + "   (ms, median)")
+    totals = dict.fromkeys(modes, 0.0)
+
+    for name in sorted(samples["compile"]):
+        line = f"{name:<40}"
+        for mode in modes:
+            value = statistics.median(samples[mode][name])
+            totals[mode] += value
+            line += f" {value:>10.2f}"
+        print(line)
+
+    print(f"{'total':<40}" + "".join(f" {totals[mode]:>10.2f}" for mode in modes))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,10 +8,11 @@ Usage:
     python create_admin.py
 """
 
-from app import app, db
+from app import create_app, db
 from app.models import User
 
 # Push app context
+app = create_app()
 app.app_context().push()
 
 def create_admin():
@@ -0,0 +1,402 @@
+"""
+Synthetic Dataset Generator for HealNest
+
+Fills the database with a large, realistic dataset for load and performance
+testing: departments, doctors, patients, availability, appointments (with a
+realistic status mix), status history, treatments and notifications.
+
+Rows are written with bulk Core inserts in batches, every account shares one
+precomputed password hash, and the output is fully deterministic for a given
+--seed.
+
+Usage:
+    python generate_data.py --preset small
+    python generate_data.py --preset large --reset
+    python generate_data.py --doctors 500 --patients 200000 \\
+        --appointments 5000000 --seed 7
+
+All generated accounts use the password given by --password
+(default "password123").
+"""
+
+import argparse
+import random
+import time as clock
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import func
+
+from app import create_app, db
+from app.models import (
+    Appointment,
+    AppointmentStatusHistory,
+    Availability,
+    Department,
+    DoctorProfile,
+    Notification,
+    PatientProfile,
+    Tenant,
+    Treatment,
+    User,
+)
+from app.passwords import hasher
+from app.tenancy import ensure_default_tenant
+
+
+PRESETS = {
+    "small": dict(departments=8, doctors=20, patients=500, appointments=10_000),
+    "medium": dict(departments=12, doctors=100, patients=20_000, appointments=500_000),
+    "large": dict(departments=16, doctors=500, patients=200_000, appointments=5_000_000),
+}
+
+DEPARTMENTS = [
+    ("General Medicine", "Diagnosis and treatment of common illnesses."),
+    ("Cardiology", "Heart and cardiovascular system treatment."),
+    ("Orthopedics", "Bone and musculoskeletal treatment."),
+    ("Pediatrics", "Medical care for infants and children."),
+    ("Gynecology", "Women’s reproductive health."),
+    ("Dermatology", "Skin disorders treatment."),
+    ("Neurology", "Brain and nervous system treatment."),
+    ("General Surgery", "General surgical procedures."),
+    ("ENT", "Ear, nose and throat care."),
+    ("Ophthalmology", "Eye care and vision treatment."),
+    ("Psychiatry", "Mental health diagnosis and treatment."),
+    ("Oncology", "Cancer diagnosis and treatment."),
+    ("Nephrology", "Kidney care and dialysis."),
+    ("Gastroenterology", "Digestive system treatment."),
+    ("Pulmonology", "Lung and respiratory care."),
+    ("Endocrinology", "Hormone and metabolic disorders."),
+]
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Akash", "Ananya", "Arjun", "Deepa", "Divya", "Gaurav",
+    "Ishaan", "Kavya", "Kiran", "Meera", "Neha", "Nikhil", "Pooja", "Priya",
+    "Rahul", "Ravi", "Riya", "Rohan", "Sanjay", "Sneha", "Tanvi", "Varun",
+]
+
+LAST_NAMES = [
+    "Agarwal", "Bansal", "Chopra", "Desai", "Gupta", "Iyer", "Joshi", "Kapoor",
+    "Kulkarni", "Mehta", "Menon", "Mishra", "Nair", "Patel", "Rao", "Reddy",
+    "Shah", "Sharma", "Singh", "Verma",
+]
+
+QUALIFICATIONS = ["MBBS", "MBBS, MD", "MBBS, DNB", "MBBS, MS", "MBBS, DM"]
+GENDERS = ["Male", "Female", "Other"]
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-"]
+VISIT_TYPES = ["In-person", "Follow-up", "Consultation"]
+TESTS = ["", "ECG", "Blood Test", "X-Ray", "MRI", "Ultrasound"]
+
+# Same session split as doctor_routes.TIME_SLOTS, in 30 minute slots
+SESSIONS = [(time(8, 0), time(12, 0)), (time(16, 0), time(21, 0))]
+SLOT_TIMES = [
+    (datetime.combine(date.min, start) + timedelta(minutes=30 * i)).time()
+    for start, end in SESSIONS
+    for i in range(
+        (datetime.combine(date.min, end) - datetime.combine(date.min, start))
+        // timedelta(minutes=30)
+    )
+]
+
+# Status mix for appointments in the past / future
+PAST_STATUSES = (["COMPLETED"] * 75) + (["CANCELLED"] * 15) + (["BOOKED"] * 10)
+FUTURE_STATUSES = (["BOOKED"] * 90) + (["CANCELLED"] * 10)
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+class Batcher:
+    """
+    Buffers rows per table and writes them with executemany inserts.
+
+    Buffers are always flushed together in the order tables were first seen,
+    so parent rows reach the database before the rows referencing them.
+    """
+
+    def __init__(self, conn, batch_size):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model, rows in self.buffers.items():
+            if rows:
+                self.conn.execute(model.__table__.insert(), rows)
+                self.counts[model.__tablename__] = self.counts.get(model.__tablename__, 0) + len(rows)
+                self.buffers[model] = []
+
+
+def next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def reset_sequences(conn, models):
+    """Move Postgres id sequences past the ids assigned here."""
+    if conn.dialect.name != "postgresql":
+        return
+
+    for model in models:
+        table = model.__tablename__
+        conn.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 0) + 1 FROM \"{table}\"), false)"
+        )
+
+
+def full_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+# -----------------------------
+# Generator
+# -----------------------------
+def generate(departments, doctors, patients, appointments, seed=42,
+             password="password123", days_back=730, days_ahead=30,
+             availability_days=None, batch_size=5000, reset=False):
+
+    rng = random.Random(seed)
+    started = clock.perf_counter()
+
+    if reset:
+        db.drop_all()
+    db.create_all()
+    ensure_default_tenant()
+
+    password_hash = hasher.hash(password)
+
+    now = datetime.now().replace(second=0, microsecond=0)
+    today = now.date()
+
+    ids = {
+        model: next_id(model)
+        for model in (User, Department, DoctorProfile, PatientProfile,
+                      Availability, Appointment)
+    }
+    existing_departments = {name for (name,) in db.session.query(Department.name)}
+    db.session.remove()
+
+    with db.engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+
+        out = Batcher(conn, batch_size)
+
+        # ---------- Departments ----------
+        department_ids = []
+        for i in range(departments):
+            name, description = DEPARTMENTS[i % len(DEPARTMENTS)]
+            dept_id = ids[Department] + i
+            if i >= len(DEPARTMENTS) or name in existing_departments:
+                name = f"{name} ({dept_id})"
+            department_ids.append(dept_id)
+            out.add(Department, dict(
+                id=dept_id,
+                name=name,
+                description=description,
+            ))
+        out.flush()
+
+        # ---------- Doctors ----------
+        doctor_user_ids = []
+        doctor_profile_ids = []
+        for i in range(doctors):
+            user_id = ids[User] + i
+            profile_id = ids[DoctorProfile] + i
+            created = now - timedelta(days=rng.randint(days_back, days_back + 365))
+            doctor_user_ids.append(user_id)
+            doctor_profile_ids.append(profile_id)
+
+            out.add(User, dict(
+                id=user_id,
+                email=f"doctor{user_id}@gen.healnest.com",
+                password_hash=password_hash,
+                role="doctor",
+                is_active=rng.random() > 0.02,
+                is_deleted=False,
+                is_temp_password=False,
+                must_change_password=False,
+                created_at=created,
+                updated_at=created,
+            ))
+            out.add(DoctorProfile, dict(
+                id=profile_id,
+                user_id=user_id,
+                department_id=department_ids[i % len(department_ids)],
+                full_name=full_name(rng),
+                qualifications=rng.choice(QUALIFICATIONS),
+                experience_years=rng.randint(1, 35),
+                contact_number=f"9{rng.randint(100000000, 999999999)}",
+                bio="Experienced consultant.",
+                consultation_fee=rng.choice([300, 500, 800, 1000, 1500]),
+                currency="INR",
+            ))
+        out.flush()
+
+        # ---------- Patients ----------
+        first_patient_id = ids[User] + doctors
+        for i in range(patients):
+            user_id = first_patient_id + i
+            created = now - timedelta(days=rng.randint(0, days_back + 365))
+
+            out.add(User, dict(
+                id=user_id,
+                email=f"patient{user_id}@gen.healnest.com",
+                password_hash=password_hash,
+                role="patient",
+                is_active=rng.random() > 0.01,
+                is_deleted=rng.random() < 0.01,
+                is_temp_password=False,
+                must_change_password=False,
+                created_at=created,
+                updated_at=created,
+            ))
+            out.add(PatientProfile, dict(
+                id=ids[PatientProfile] + i,
+                user_id=user_id,
+                full_name=full_name(rng),
+                date_of_birth=today - timedelta(days=rng.randint(365, 365 * 85)),
+                gender=rng.choice(GENDERS),
+                contact_number=f"8{rng.randint(100000000, 999999999)}",
+                blood_group=rng.choice(BLOOD_GROUPS),
+                created_at=created,
+                updated_at=created,
+            ))
+        out.flush()
+
+        # ---------- Availability (upcoming window) ----------
+        # Today through today + availability_days, which by default covers
+        # every future appointment and the booking page's date range
+        if availability_days is None:
+            availability_days = days_ahead
+
+        availability_id = ids[Availability]
+        for profile_id in doctor_profile_ids:
+            for day in range(availability_days + 1):
+                for start, end in SESSIONS:
+                    if rng.random() < 0.8:
+                        out.add(Availability, dict(
+                            id=availability_id,
+                            doctor_profile_id=profile_id,
+                            available_date=today + timedelta(days=day),
+                            start_time=start,
+                            end_time=end,
+                        ))
+                        availability_id += 1
+        out.flush()
+
+        # ---------- Appointments ----------
+        # Each doctor gets distinct slots, so no two BOOKED rows collide.
+        first_day = today - timedelta(days=days_back)
+        slot_space = (days_back + days_ahead) * len(SLOT_TIMES)
+        per_doctor, remainder = divmod(appointments, max(doctors, 1))
+
+        appointment_id = ids[Appointment]
+        for n, doctor_id in enumerate(doctor_user_ids):
+            count = min(per_doctor + (1 if n < remainder else 0), slot_space)
+
+            for slot in rng.sample(range(slot_space), count):
+                day, slot_index = divmod(slot, len(SLOT_TIMES))
+                when = datetime.combine(
+                    first_day + timedelta(days=day), SLOT_TIMES[slot_index]
+                )
+                created = when - timedelta(days=rng.randint(1, 30), minutes=rng.randint(0, 600))
+                status = rng.choice(PAST_STATUSES if when < now else FUTURE_STATUSES)
+                patient_id = first_patient_id + rng.randrange(max(patients, 1))
+
+                out.add(Appointment, dict(
+                    id=appointment_id,
+                    patient_id=patient_id,
+                    doctor_id=doctor_id,
+                    appointment_datetime=when,
+                    status=status,
+                    created_at=created,
+                ))
+
+                if status != "BOOKED":
+                    changed_at = min(when, now) if status == "COMPLETED" else created + timedelta(hours=rng.randint(1, 48))
+                    out.add(AppointmentStatusHistory, dict(
+                        appointment_id=appointment_id,
+                        old_status="BOOKED",
+                        new_status=status,
+                        changed_at=changed_at,
+                    ))
+                    out.add(Notification, dict(
+                        user_id=patient_id if status == "COMPLETED" else doctor_id,
+                        type=f"APPOINTMENT_{status}",
+                        message=f"Appointment on {when:%d %b %Y %I:%M %p} {status.lower()}.",
+                        is_read=changed_at < now - timedelta(days=7) or rng.random() < 0.5,
+                        created_at=changed_at,
+                    ))
+
+                if status == "COMPLETED":
+                    out.add(Treatment, dict(
+                        appointment_id=appointment_id,
+                        visit_type=rng.choice(VISIT_TYPES),
+                        tests_done=rng.choice(TESTS),
+                        diagnosis="Routine examination, no acute findings.",
+                        prescription="Paracetamol 500mg (1-0-1) for 3 days.",
+                        created_at=when + timedelta(minutes=30),
+                    ))
+
+                appointment_id += 1
+
+        out.flush()
+        reset_sequences(conn, [Tenant, *ids])
+
+    elapsed = clock.perf_counter() - started
+    for table, count in out.counts.items():
+        print(f"  {table:<28} {count:>10,}")
+    print(f"Done in {elapsed:.1f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a large synthetic HealNest dataset."
+    )
+    parser.add_argument("--preset", choices=PRESETS, default="small")
+    parser.add_argument("--departments", type=int)
+    parser.add_argument("--doctors", type=int)
+    parser.add_argument("--patients", type=int)
+    parser.add_argument("--appointments", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--days-back", type=int, default=730)
+    parser.add_argument("--days-ahead", type=int, default=30)
+    parser.add_argument("--availability-days", type=int,
+                        help="Days of upcoming availability (default --days-ahead).")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--reset", action="store_true",
+        help="Drop and recreate all tables first (DESTROYS existing data)."
+    )
+    args = parser.parse_args()
+
+    volumes = dict(PRESETS[args.preset])
+    for key in volumes:
+        if getattr(args, key) is not None:
+            volumes[key] = getattr(args, key)
+
+    print("Generating dataset: " + ", ".join(f"{k}={v:,}" for k, v in volumes.items()))
+
+    with create_app().app_context():
+        generate(
+            seed=args.seed,
+            password=args.password,
+            days_back=args.days_back,
+            days_ahead=args.days_ahead,
+            availability_days=args.availability_days,
+            batch_size=args.batch_size,
+            reset=args.reset,
+            **volumes,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Gunicorn settings (picked up automatically from the working directory).
+
+The app is built once in the master with --preload and forked into the
+workers, so each worker skips the import / create_app cost. Anything that
+holds OS resources (DB connections, the password pool) must not be shared
+across the fork, hence the post_fork hook.
+"""
+
+import os
+
+preload_app = True
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+
+def when_ready(server):
+    # Compile templates once in the master; workers inherit them on fork
+    from app.template_cache import precompile
+
+    precompile(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    from app import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    # Threads don't survive the fork, so the reminder scheduler (if
+    # enabled) is started in each worker
+    from app.reminders import start_scheduler
+
+    start_scheduler(app)
@@ -0,0 +1,44 @@
+"""Add resource_version table for conditional GET
+
+Revision ID: 5c2f9a1d7e40
+Revises: dbe153146452
+Create Date: 2026-10-19 09:12:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2f9a1d7e40'
+down_revision = 'dbe153146452'
+branch_labels = None
+depends_on = None
+
+
+TABLES = [
+    'user', 'department', 'doctor_profile', 'patient_profile', 'availability',
+    'appointment', 'appointment_status_history', 'notification',
+    'doctor_availability', 'treatment',
+]
+
+
+def upgrade():
+    resource_version = op.create_table('resource_version',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    now = datetime.utcnow()
+    op.bulk_insert(
+        resource_version,
+        [{'name': name, 'version': 0, 'updated_at': now} for name in TABLES]
+    )
+
+
+def downgrade():
+    op.drop_table('resource_version')
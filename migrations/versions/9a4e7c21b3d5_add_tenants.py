@@ -0,0 +1,107 @@
+"""Add tenants and tenant_id on tenant-scoped tables
+
+Revision ID: 9a4e7c21b3d5
+Revises: 5c2f9a1d7e40
+Create Date: 2026-10-19 14:05:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4e7c21b3d5'
+down_revision = '5c2f9a1d7e40'
+branch_labels = None
+depends_on = None
+
+
+SCOPED_TABLES = ['department', 'user', 'availability', 'appointment', 'notification']
+
+INDEXES = [
+    ('ix_user_tenant_role', 'user', ['tenant_id', 'role']),
+    ('ix_availability_tenant_doctor_date', 'availability',
+     ['tenant_id', 'doctor_profile_id', 'available_date']),
+    ('ix_appointment_tenant_datetime', 'appointment', ['tenant_id', 'appointment_datetime']),
+    ('ix_appointment_tenant_doctor_datetime', 'appointment',
+     ['tenant_id', 'doctor_id', 'appointment_datetime']),
+    ('ix_appointment_tenant_patient_status', 'appointment',
+     ['tenant_id', 'patient_id', 'status']),
+    ('ix_notification_tenant_user_read', 'notification', ['tenant_id', 'user_id', 'is_read']),
+]
+
+
+def _department_name_unique():
+    """Name of the old global unique constraint on department.name."""
+    inspector = sa.inspect(op.get_bind())
+    for constraint in inspector.get_unique_constraints('department'):
+        if constraint['column_names'] == ['name']:
+            return constraint['name'] or 'uq_department_name'
+    return None
+
+
+def upgrade():
+    tenant = op.create_table('tenant',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('slug', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('hostname', sa.String(length=255), nullable=True),
+    sa.Column('bind_key', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('slug'),
+    sa.UniqueConstraint('hostname')
+    )
+
+    # Every existing row belongs to the default tenant, under the slug the
+    # app resolves it by (DEFAULT_TENANT)
+    op.bulk_insert(tenant, [
+        {'id': 1, 'slug': current_app.config['DEFAULT_TENANT'], 'name': 'HealNest',
+         'created_at': datetime.utcnow()}
+    ])
+    if op.get_bind().dialect.name == 'postgresql':
+        # The id was set by hand, move the sequence past it
+        op.execute("SELECT setval(pg_get_serial_sequence('tenant', 'id'), (SELECT MAX(id) FROM tenant))")
+
+    for table in SCOPED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column('tenant_id', sa.Integer(), nullable=False, server_default='1')
+            )
+            batch_op.create_foreign_key(
+                f'fk_{table}_tenant_id', 'tenant', ['tenant_id'], ['id']
+            )
+
+    # Department names are unique per tenant, not globally. SQLite reports
+    # the old constraint without a name, so give it one for batch mode.
+    old_unique = _department_name_unique()
+    with op.batch_alter_table(
+        'department',
+        schema=None,
+        naming_convention={'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+    ) as batch_op:
+        if old_unique:
+            batch_op.drop_constraint(old_unique, type_='unique')
+        batch_op.create_unique_constraint('uq_department_tenant_name', ['tenant_id', 'name'])
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    with op.batch_alter_table('department', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_department_tenant_name', type_='unique')
+        batch_op.create_unique_constraint('uq_department_name', ['name'])
+
+    for table in reversed(SCOPED_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_tenant_id', type_='foreignkey')
+            batch_op.drop_column('tenant_id')
+
+    op.drop_table('tenant')
@@ -0,0 +1,26 @@
+"""Add user.calendar_feed_secret for calendar feed tokens
+
+Revision ID: a91d3e5c7f20
+Revises: f2a6c8e0b91d
+Create Date: 2026-10-20 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91d3e5c7f20'
+down_revision = 'f2a6c8e0b91d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('calendar_feed_secret', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('calendar_feed_secret')
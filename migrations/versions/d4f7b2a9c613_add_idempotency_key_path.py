@@ -0,0 +1,26 @@
+"""Add idempotency_key.path so a key can't be replayed on another URL
+
+Revision ID: d4f7b2a9c613
+Revises: a91d3e5c7f20
+Create Date: 2026-10-20 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f7b2a9c613'
+down_revision = 'a91d3e5c7f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('idempotency_key', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('path', sa.String(length=500), nullable=False, server_default=''))
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_key', schema=None) as batch_op:
+        batch_op.drop_column('path')
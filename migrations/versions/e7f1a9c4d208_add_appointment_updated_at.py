@@ -0,0 +1,28 @@
+"""Add appointment.updated_at for calendar feed versioning
+
+Revision ID: e7f1a9c4d208
+Revises: c3b8d52f6a17
+Create Date: 2026-10-19 18:02:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f1a9c4d208'
+down_revision = 'c3b8d52f6a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.execute('UPDATE appointment SET updated_at = created_at')
+
+
+def downgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,32 @@
+"""Add appointment_reminder table
+
+Revision ID: f2a6c8e0b91d
+Revises: e7f1a9c4d208
+Create Date: 2026-10-19 19:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6c8e0b91d'
+down_revision = 'e7f1a9c4d208'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('appointment_reminder',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('appointment_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointment.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('appointment_id', 'kind', name='uq_reminder_appointment_kind')
+    )
+
+
+def downgrade():
+    op.drop_table('appointment_reminder')
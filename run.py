@@ -1,9 +1,18 @@
 import os
-from app import app
+from app import create_app
+
+# Module-level app for gunicorn ("gunicorn run:app", see gunicorn.conf.py)
+app = create_app(
+    "development" if os.environ.get("FLASK_ENV") == "development" else None
+)
 
 if __name__ == "__main__":
     # This is for local development only
     # In production, Render will use gunicorn to serve the app
     debug = os.environ.get("FLASK_ENV") == "development"
+
+    from app.reminders import start_scheduler
+    start_scheduler(app)
+
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=debug)
@@ -1,9 +1,11 @@
-from app import app, db
+from app import create_app, db
 from app.models import Department, User, DoctorProfile, PatientProfile
 from datetime import date
 
 
-def seed_data():
+def seed_data(app=None):
+    app = app or create_app()
+
     with app.app_context():
 
         # -----------------------------
@@ -0,0 +1,76 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+from app import create_app, db
+from app.models import Availability, Department, DoctorProfile, PatientProfile, Tenant, User
+from app.tenancy import ensure_default_tenant
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("APP_CONFIG", "testing")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "TENANT_BINDS": {},
+    })
+
+    with app.app_context():
+        db.create_all()
+        ensure_default_tenant()
+        db.session.add(Tenant(id=2, slug="north", name="North", hostname="north.test"))
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+
+
+def make_user(tenant_id, role, email, name, department=None):
+    user = User(
+        tenant_id=tenant_id,
+        email=email,
+        role=role,
+        password_hash="x",
+        is_temp_password=False,
+        must_change_password=False,
+    )
+    db.session.add(user)
+    db.session.flush()
+
+    if role == "doctor":
+        db.session.add(DoctorProfile(user_id=user.id, department_id=department.id, full_name=name))
+    elif role == "patient":
+        db.session.add(PatientProfile(user_id=user.id, full_name=name))
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def hospital(app):
+    """A patient in the default tenant and a doctor in each tenant."""
+    doctors = {}
+    for tenant_id in (1, 2):
+        department = Department(tenant_id=tenant_id, name="Cardiology")
+        db.session.add(department)
+        db.session.flush()
+
+        doctor = make_user(tenant_id, "doctor", f"doctor{tenant_id}@example.com", f"Doctor {tenant_id}", department)
+        db.session.add(Availability(
+            tenant_id=tenant_id,
+            doctor_profile_id=doctor.doctor_profile.id,
+            available_date=date.today() + timedelta(days=1),
+            start_time=time(9, 0),
+            end_time=time(12, 0),
+        ))
+        db.session.commit()
+        doctors[tenant_id] = doctor.doctor_profile.id
+
+    patient = make_user(1, "patient", "patient@example.com", "Patient One")
+    return {"patient_id": patient.id, "doctors": doctors}
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
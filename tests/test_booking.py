@@ -0,0 +1,36 @@
+from datetime import date, datetime, time, timedelta
+
+from app import db
+from app.models import Appointment
+from tests.conftest import login
+
+
+def test_series_rejects_start_with_utc_offset(app, hospital):
+    client = app.test_client()
+    login(client, hospital["patient_id"])
+    start = datetime.combine(date.today() + timedelta(days=1), time(9, 0))
+
+    response = client.post(
+        f"/patient/doctor/{hospital['doctors'][1]}/series",
+        json={"start": start.isoformat() + "+05:30", "count": 2},
+    )
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert db.session.query(Appointment).count() == 0
+
+
+def test_series_books_local_start(app, hospital):
+    client = app.test_client()
+    login(client, hospital["patient_id"])
+    start = datetime.combine(date.today() + timedelta(days=1), time(9, 0))
+
+    response = client.post(
+        f"/patient/doctor/{hospital['doctors'][1]}/series",
+        json={"start": start.isoformat(), "count": 2},
+    )
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [b["appointment_datetime"] for b in body["booked"]] == [start.isoformat()]
+    assert [c["reason"] for c in body["conflicts"]] == ["unavailable"]
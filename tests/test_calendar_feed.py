@@ -0,0 +1,76 @@
+from app import db, ical
+from app.models import User
+from tests.conftest import login
+
+
+def doctor_user(hospital):
+    return db.session.query(User).filter_by(email="doctor1@example.com").one()
+
+
+def create_feed(doctor):
+    ical.reset_feed_secret(doctor)
+    db.session.commit()
+
+
+def test_feed_token_does_not_contain_password_hash(app, hospital):
+    doctor = doctor_user(hospital)
+    doctor.password_hash = "$2b$04$" + "a" * 53
+    create_feed(doctor)
+
+    token = ical.feed_token(doctor)
+
+    assert doctor.password_hash[-8:] not in token
+
+
+def test_feed_url_works_until_password_changes(app, hospital):
+    doctor = doctor_user(hospital)
+    client = app.test_client()
+    create_feed(doctor)
+    token = ical.feed_token(doctor)
+
+    response = client.get(f"/doctor/calendar/{token}.ics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/calendar"
+
+    assert client.get(f"/doctor/calendar/{token}x.ics").status_code == 404
+    assert client.get("/doctor/calendar/garbage.ics").status_code == 404
+
+    app.config["BCRYPT_LOG_ROUNDS"] = 4
+    doctor.rehash_password("x")
+    db.session.commit()
+    assert client.get(f"/doctor/calendar/{token}.ics").status_code == 200
+
+    doctor.set_password("a new password")
+    db.session.commit()
+    assert client.get(f"/doctor/calendar/{token}.ics").status_code == 404
+
+
+def test_profile_page_does_not_write(app, hospital):
+    doctor = doctor_user(hospital)
+    client = app.test_client()
+    login(client, doctor.id)
+
+    response = client.get("/doctor/profile")
+
+    assert response.status_code == 200
+    assert b".ics" not in response.data
+    db.session.expire_all()
+    assert doctor.calendar_feed_secret is None
+
+
+def test_reset_link_replaces_feed_url(app, hospital):
+    doctor = doctor_user(hospital)
+    client = app.test_client()
+    login(client, doctor.id)
+    create_feed(doctor)
+    old_token = ical.feed_token(doctor)
+
+    response = client.post("/doctor/calendar/reset")
+    assert response.status_code == 302
+
+    db.session.expire_all()
+    new_token = ical.feed_token(doctor)
+    assert new_token != old_token
+    assert f"/doctor/calendar/{new_token}.ics".encode() in client.get("/doctor/profile").data
+    assert client.get(f"/doctor/calendar/{old_token}.ics").status_code == 404
+    assert client.get(f"/doctor/calendar/{new_token}.ics").status_code == 200
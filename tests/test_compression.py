@@ -0,0 +1,19 @@
+from tests.conftest import login
+
+
+def test_not_modified_keeps_vary(app, hospital):
+    client = app.test_client()
+    login(client, hospital["patient_id"])
+    url = f"/patient/doctor/{hospital['doctors'][1]}"
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+
+    response = client.get(url, headers={
+        "Accept-Encoding": "gzip",
+        "If-None-Match": response.headers["ETag"],
+    })
+    assert response.status_code == 304
+    assert "Accept-Encoding" in response.vary
@@ -0,0 +1,21 @@
+from app.fragment_cache import FragmentCache
+from app.versioning import bump
+
+DOCTORS = ("1:department-doctors:3", "<table></table>", 600, ["department:3", "doctor_profile", "user"])
+DEPARTMENTS = ("1:patient-departments", "<ul></ul>", 600, ["department"])
+
+
+def test_write_in_another_worker_drops_fragment(app):
+    cache = FragmentCache(recheck_seconds=0)
+    cache.set(*DOCTORS)
+    cache.set(*DEPARTMENTS)
+    cache.sync()
+    cache.set(*DOCTORS)
+    cache.set(*DEPARTMENTS)
+
+    # Another process commits: the version moves but no signal reaches us
+    bump({"doctor_profile"})
+    cache.sync()
+
+    assert cache.get("1:department-doctors:3") is None
+    assert cache.get("1:patient-departments") == "<ul></ul>"
@@ -0,0 +1,132 @@
+import threading
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app import db, idempotency
+from app.models import Appointment, AppointmentStatusHistory, DoctorProfile, IdempotencyKey
+from app.routes import patient_routes
+from tests.conftest import login
+
+
+@pytest.fixture
+def bookings(app, hospital):
+    """Two upcoming appointments of the patient with the tenant 1 doctor."""
+    doctor = db.session.get(DoctorProfile, hospital["doctors"][1])
+    ids = []
+    for hour in (9, 10):
+        appointment = Appointment(
+            tenant_id=1,
+            patient_id=hospital["patient_id"],
+            doctor_id=doctor.user_id,
+            appointment_datetime=datetime.combine(date.today() + timedelta(days=1), time(hour, 0)),
+            status="BOOKED",
+        )
+        db.session.add(appointment)
+        db.session.commit()
+        ids.append(appointment.id)
+    return ids
+
+
+@pytest.fixture
+def client(app, hospital):
+    client = app.test_client()
+    login(client, hospital["patient_id"])
+    return client
+
+
+def cancel(client, appointment_id, key="key-1"):
+    return client.post(
+        f"/patient/appointment/{appointment_id}/cancel",
+        headers={idempotency.HEADER: key},
+    )
+
+
+def status(appointment_id):
+    db.session.expire_all()
+    return db.session.get(Appointment, appointment_id).status
+
+
+def flashes(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.pop("_flashes", [])]
+
+
+def test_retry_replays_outcome(client, bookings):
+    first = cancel(client, bookings[0])
+    assert first.status_code == 302
+    assert flashes(client) == ["Appointment cancelled successfully."]
+
+    retry = cancel(client, bookings[0])
+
+    assert retry.status_code == 302
+    assert retry.headers["Location"] == first.headers["Location"]
+    assert flashes(client) == ["Appointment cancelled successfully."]
+    assert db.session.query(AppointmentStatusHistory).count() == 1
+
+
+def test_key_reused_on_another_url_is_rejected(client, bookings):
+    cancel(client, bookings[0])
+
+    response = cancel(client, bookings[1])
+
+    assert response.status_code == 422
+    assert status(bookings[0]) == "CANCELLED"
+    assert status(bookings[1]) == "BOOKED"
+
+
+def test_failed_request_releases_key(app, client, bookings, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(patient_routes.appointments, "transition", broken)
+        with pytest.raises(RuntimeError):
+            cancel(client, bookings[0])
+
+    assert db.session.query(IdempotencyKey).count() == 0
+
+    assert cancel(client, bookings[0]).status_code == 302
+    assert status(bookings[0]) == "CANCELLED"
+
+
+def in_flight_claim(hospital, appointment_id):
+    path = f"/patient/appointment/{appointment_id}/cancel"
+    idempotency.claim(hospital["patient_id"], "patient.cancel_appointment", "key-1", path)
+    return path
+
+
+def test_retry_waits_for_in_flight_outcome(app, hospital, client, bookings):
+    app.config["IDEMPOTENCY_WAIT_SECONDS"] = 5
+    in_flight_claim(hospital, bookings[0])
+
+    def finish():
+        with app.app_context():
+            idempotency.complete(
+                hospital["patient_id"], "patient.cancel_appointment", "key-1",
+                status_code=302, location="/patient/dashboard",
+                messages=[["success", "Appointment cancelled successfully."]],
+            )
+
+    timer = threading.Timer(0.3, finish)
+    timer.start()
+    try:
+        response = cancel(client, bookings[0])
+    finally:
+        timer.join()
+
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/patient/dashboard"
+    assert flashes(client) == ["Appointment cancelled successfully."]
+    assert status(bookings[0]) == "BOOKED"  # the view didn't run again
+
+
+def test_retry_gives_up_waiting_for_in_flight_request(app, hospital, client, bookings):
+    app.config["IDEMPOTENCY_WAIT_SECONDS"] = 0
+    in_flight_claim(hospital, bookings[0])
+
+    response = cancel(client, bookings[0])
+
+    assert response.status_code == 302
+    assert flashes(client) == ["Your request is still being processed."]
+    assert status(bookings[0]) == "BOOKED"
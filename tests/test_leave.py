@@ -0,0 +1,18 @@
+from tests.conftest import login
+
+
+def test_leave_sends_anonymous_users_to_login_and_back(app):
+    response = app.test_client().get("/doctor/leave")
+
+    assert response.status_code == 302
+    assert response.headers["Location"].startswith("/login?next=")
+
+
+def test_leave_is_for_doctors_only(app, hospital):
+    client = app.test_client()
+    login(client, hospital["patient_id"])
+
+    response = client.get("/doctor/leave")
+
+    assert response.status_code == 302
+    assert "/login" not in response.headers["Location"]
@@ -0,0 +1,38 @@
+import os
+import signal
+
+import pytest
+
+from app.passwords import PasswordPoolBusy, hasher
+
+
+@pytest.fixture
+def pool(app):
+    app.config.update(
+        PASSWORD_POOL_WORKERS=1,
+        PASSWORD_POOL_MAX_QUEUE=1,
+        PASSWORD_POOL_QUEUE_WAIT=0,
+        PASSWORD_POOL_TIMEOUT=30,
+        BCRYPT_LOG_ROUNDS=4,
+    )
+    hasher.hash("warm up")  # start the pool process outside the timings
+    yield app
+    hasher.shutdown()
+
+
+def test_slow_hash_is_busy_not_an_error(pool):
+    pool.config.update(BCRYPT_LOG_ROUNDS=14, PASSWORD_POOL_TIMEOUT=0.05)
+
+    with pytest.raises(PasswordPoolBusy):
+        hasher.hash("secret")
+
+    # The timed-out job still holds the only slot until it finishes
+    with pytest.raises(PasswordPoolBusy):
+        hasher.hash("secret")
+
+
+def test_broken_pool_is_replaced(pool):
+    for pid in list(hasher._executor._processes):
+        os.kill(pid, signal.SIGKILL)
+
+    assert hasher.check(hasher.hash("secret"), "secret")
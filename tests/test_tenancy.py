@@ -0,0 +1,50 @@
+from datetime import date, datetime, time, timedelta
+
+from app import db
+from app.models import Appointment
+from tests.conftest import login
+
+
+def test_doctor_from_other_tenant_is_not_found(app, hospital):
+    client = app.test_client()
+    login(client, hospital["patient_id"])
+
+    assert client.get(f"/patient/doctor/{hospital['doctors'][1]}").status_code == 200
+    assert client.get(f"/patient/doctor/{hospital['doctors'][2]}").status_code == 404
+
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    response = client.get(f"/patient/doctor/{hospital['doctors'][2]}/slots?date={tomorrow}")
+    assert response.status_code == 404
+
+
+def test_cannot_book_doctor_from_other_tenant(app, hospital):
+    client = app.test_client()
+    login(client, hospital["patient_id"])
+    slot = datetime.combine(date.today() + timedelta(days=1), time(9, 0)).isoformat()
+
+    response = client.post(
+        f"/patient/book/{hospital['doctors'][2]}",
+        data={"selected_slot": slot},
+    )
+    assert response.status_code == 404
+
+    response = client.post(
+        f"/patient/doctor/{hospital['doctors'][2]}/series",
+        json={"start": slot, "count": 1},
+    )
+    assert response.status_code == 404
+
+    assert db.session.query(Appointment).count() == 0
+
+
+def test_can_book_doctor_from_own_tenant(app, hospital):
+    client = app.test_client()
+    login(client, hospital["patient_id"])
+    slot = datetime.combine(date.today() + timedelta(days=1), time(9, 0)).isoformat()
+
+    response = client.post(
+        f"/patient/book/{hospital['doctors'][1]}",
+        data={"selected_slot": slot},
+    )
+    assert response.status_code == 302
+    assert db.session.query(Appointment).count() == 1